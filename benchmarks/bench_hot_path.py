@@ -0,0 +1,145 @@
+"""Benchmarks for the chat and tool-calling hot path, run against the mock backend."""
+
+from typing import Any, Dict
+
+from harness import BenchResult, measure, measure_async
+
+from ai_cli_assistant.backends import MockBackend
+from ai_cli_assistant.base import Tool
+from ai_cli_assistant.client import OpenAIClient
+from ai_cli_assistant.config import Config
+from ai_cli_assistant.history import ChatMessage
+from ai_cli_assistant.registry import ToolRegistry, registry
+from ai_cli_assistant.tools import CalculatorTool, WeatherTool, WebSearchTool
+
+TOOL_CALLS = [
+    {"name": "weather", "arguments": {"location": "London"}},
+    {"name": "calculator", "arguments": {"expression": "(3 + 4) * 12"}},
+]
+
+
+class NoopTool(Tool):
+    """Tool that does nothing, to isolate registry overhead."""
+    
+    def __init__(self, name: str = "noop") -> None:
+        self._name = name
+    
+    @property
+    def name(self) -> str:
+        return self._name
+    
+    @property
+    def description(self) -> str:
+        return f"Benchmark tool {self._name}"
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "value": {"type": "string", "description": "Ignored value"}
+            },
+            "required": ["value"]
+        }
+    
+    async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        return {"value": kwargs.get("value")}
+
+
+def _ensure_tools() -> None:
+    for tool in (CalculatorTool(), WeatherTool(), WebSearchTool()):
+        if registry.get_tool(tool.name) is None:
+            registry.register(tool)
+
+
+def _client(tool_calls: bool) -> OpenAIClient:
+    config = Config(openai_api_key="", backend="mock", stream_responses=False)
+    backend = MockBackend(tool_calls=TOOL_CALLS if tool_calls else None)
+    return OpenAIClient(config, backend=backend)
+
+
+def bench_turns(iterations: int) -> Dict[str, BenchResult]:
+    """Full chat turns and process_response with and without tool rounds."""
+    _ensure_tools()
+    results = {}
+    
+    for label, tool_calls in (("text_only", False), ("two_tool_calls", True)):
+        client = _client(tool_calls)
+        results[f"turn.{label}"] = measure_async(
+            lambda: client.chat("What's the weather in London and what is 7 * 12?"),
+            iterations,
+            setup=client.conversation_history.clear,
+        )
+    
+    client = _client(True)
+    response = MockBackend(tool_calls=TOOL_CALLS)._reply(
+        [{"role": "user", "content": "prompt"}], "bench", True
+    )
+    reply = ChatMessage.from_sdk(response)
+    
+    def reset() -> None:
+        client.conversation_history.clear()
+        client._start_turn("prompt")
+    
+    results["process_response.two_tool_calls"] = measure_async(
+        lambda: client.process_response(reply),
+        iterations,
+        setup=reset,
+    )
+    return results
+
+
+def bench_dispatch(iterations: int) -> Dict[str, BenchResult]:
+    """Overhead of ToolRegistry.execute_tool over calling the tool directly."""
+    tool = NoopTool()
+    local = ToolRegistry()
+    local.register(tool)
+    
+    return {
+        "dispatch.direct": measure_async(lambda: tool.execute(value="x"), iterations),
+        "dispatch.registry": measure_async(lambda: local.execute_tool("noop", value="x"), iterations),
+    }
+
+
+def bench_definitions(iterations: int) -> Dict[str, BenchResult]:
+    """Cost of getting function definitions per request, and of rebuilding them, as tools grow."""
+    results = {}
+    for count in (3, 25, 100):
+        local = ToolRegistry()
+        for index in range(count):
+            local.register(NoopTool(f"tool_{index}"))
+        
+        results[f"definitions.build[{count}]"] = measure(local.get_function_definitions, iterations)
+        results[f"definitions.serialize[{count}]"] = measure(
+            local.get_function_definitions_json, iterations
+        )
+        results[f"definitions.rebuild[{count}]"] = measure(
+            local.get_function_definitions_json, iterations, setup=local._invalidate
+        )
+    return results
+
+
+def bench_history(iterations: int) -> Dict[str, BenchResult]:
+    """Per-request cost of preparing the message list as the history grows."""
+    results = {}
+    for size in (10, 100, 1000):
+        client = _client(False)
+        client.conversation_history.token_budget = 10 ** 9
+        for index in range(size):
+            role = "user" if index % 2 == 0 else "assistant"
+            client.add_message(role, f"message {index} " * 10)
+        
+        results[f"history.request[{size}]"] = measure(
+            lambda: client._request_params("next message", True), iterations
+        )
+    return results
+
+
+def run(iterations: int) -> Dict[str, BenchResult]:
+    """Run all hot-path benchmarks."""
+    results: Dict[str, BenchResult] = {}
+    results.update(bench_turns(iterations))
+    results.update(bench_dispatch(iterations))
+    results.update(bench_definitions(iterations))
+    results.update(bench_history(iterations))
+    return results
@@ -0,0 +1,75 @@
+"""Cold-start import time benchmark and startup budget check."""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from harness import SRC_DIR, BenchResult, summarize
+
+# Median time allowed for `import ai_cli_assistant.cli` in a fresh interpreter
+STARTUP_BUDGET_MS = 150.0
+
+# Modules that must not be imported until they are actually needed
+DEFERRED_MODULES = (
+    "openai",
+    "httpx",
+    "rich",
+    "dotenv",
+    "ai_cli_assistant.tools.calculator",
+    "ai_cli_assistant.tools.weather",
+    "ai_cli_assistant.tools.web_search",
+)
+
+IMPORT_SNIPPET = (
+    "import json, sys, time; start = time.perf_counter(); "
+    "import {module}; elapsed = time.perf_counter() - start; "
+    "print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))"
+)
+
+
+def bench_import(module: str, iterations: int) -> BenchResult:
+    """Import ``module`` in fresh interpreters and time it."""
+    samples = []
+    loaded: List[str] = []
+    for _ in range(iterations):
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(SRC_DIR)},
+        )
+        if completed.returncode != 0:
+            return {"error": completed.stderr.strip().splitlines()[-1]}
+        
+        output = json.loads(completed.stdout)
+        samples.append(output["seconds"])
+        loaded = output["modules"]
+    
+    eager = sorted(
+        name for name in loaded
+        if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED_MODULES)
+    )
+    return summarize(samples, eager_imports=eager)
+
+
+def check_budget(result: BenchResult) -> List[str]:
+    """Return the ways a startup result violates the budget (empty if none)."""
+    if "error" in result:
+        return [f"import failed: {result['error']}"]
+    
+    problems = []
+    if result["median"] * 1000 > STARTUP_BUDGET_MS:
+        problems.append(
+            f"median import time {result['median'] * 1000:.1f} ms exceeds "
+            f"the {STARTUP_BUDGET_MS:.0f} ms budget"
+        )
+    if result["eager_imports"]:
+        problems.append(f"imported at startup: {', '.join(result['eager_imports'])}")
+    return problems
+
+
+def run(iterations: int) -> Dict[str, BenchResult]:
+    """Run the startup benchmarks."""
+    return {"startup.import_cli": bench_import("ai_cli_assistant.cli", iterations)}
@@ -0,0 +1,146 @@
+"""Timing, result and comparison helpers for the benchmark suite."""
+
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Make the package importable when running from a source checkout
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+BenchResult = Dict[str, Any]
+
+
+def summarize(samples: List[float], unit: str = "s", **extra: Any) -> BenchResult:
+    """Reduce raw timing samples to the statistics stored in results files."""
+    ordered = sorted(samples)
+    result = {
+        "unit": unit,
+        "iterations": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+    result.update(extra)
+    return result
+
+
+def measure(
+    fn: Callable[[], Any],
+    iterations: int,
+    setup: Optional[Callable[[], Any]] = None,
+    warmup: int = 3,
+) -> BenchResult:
+    """Time a synchronous callable; ``setup`` runs untimed before each call."""
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    
+    samples = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def measure_async(
+    fn: Callable[[], Awaitable[Any]],
+    iterations: int,
+    setup: Optional[Callable[[], Any]] = None,
+    warmup: int = 3,
+) -> BenchResult:
+    """Time a coroutine function inside a single event loop."""
+    async def run() -> BenchResult:
+        for _ in range(warmup):
+            if setup is not None:
+                setup()
+            await fn()
+        
+        samples = []
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            await fn()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+    
+    return asyncio.run(run())
+
+
+def metadata() -> Dict[str, Any]:
+    """Describe the environment a results file was produced in."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=SRC_DIR.parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def write_results(results: Dict[str, BenchResult], path: Optional[str]) -> None:
+    """Write results as JSON to ``path``, or to stdout without one."""
+    payload = json.dumps({"meta": metadata(), "results": results}, indent=2, sort_keys=True)
+    if path:
+        Path(path).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    """Print median changes between two results files.
+
+    Returns the number of benchmarks whose median regressed by more than
+    ``threshold`` (a fraction, e.g. 0.1 for 10%).
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+    current = json.loads(Path(current_path).read_text(encoding="utf-8"))["results"]
+    
+    regressions = 0
+    width = max((len(name) for name in current), default=10)
+    for name in sorted(current):
+        new = current[name]
+        old = baseline.get(name)
+        if "median" not in new or old is None or "median" not in old:
+            print(f"{name:<{width}}  (no comparison)")
+            continue
+        
+        change = (new["median"] - old["median"]) / old["median"] if old["median"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(
+            f"{name:<{width}}  {old['median'] * 1e6:12.1f}us -> "
+            f"{new['median'] * 1e6:12.1f}us  {change:+7.1%}{flag}"
+        )
+    
+    return regressions
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite or compare two results files.
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py --compare baseline.json results.json
+    python benchmarks/run.py --check-startup
+"""
+
+import argparse
+import sys
+
+from harness import compare, write_results
+
+SUITES = ("hot_path", "startup")
+
+
+def main() -> int:
+    """Entry point for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="AI CLI Assistant benchmarks")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Iterations per benchmark")
+    parser.add_argument("--startup-iterations", type=int, default=10, help="Fresh interpreters for startup timing")
+    parser.add_argument("--suite", choices=SUITES, action="append", help="Only run the given suite(s)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two results files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Median slowdown counted as a regression")
+    parser.add_argument("--check-startup", action="store_true", help="Fail if the CLI import exceeds the startup budget")
+    args = parser.parse_args()
+    
+    if args.check_startup:
+        import bench_startup
+        result = bench_startup.bench_import("ai_cli_assistant.cli", args.startup_iterations)
+        problems = bench_startup.check_budget(result)
+        for problem in problems:
+            print(f"startup budget: {problem}")
+        if not problems:
+            print(f"startup budget: ok ({result['median'] * 1000:.1f} ms median)")
+        return 1 if problems else 0
+    
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        return 1 if regressions else 0
+    
+    suites = args.suite or SUITES
+    results = {}
+    if "hot_path" in suites:
+        import bench_hot_path
+        results.update(bench_hot_path.run(args.iterations))
+    if "startup" in suites:
+        import bench_startup
+        results.update(bench_startup.run(args.startup_iterations))
+    
+    write_results(results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Chat completion backends: the OpenAI API and an offline mock."""
+
+import asyncio
+import json
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .config import Config
+
+
+class ChatBackend(ABC):
+    """Abstract chat completion backend."""
+    
+    @abstractmethod
+    async def create(self, **params: Any) -> Any:
+        """Create a chat completion.
+
+        Accepts the parameters of ``chat.completions.create``. Returns a
+        completion object, or an async iterator of chunks when ``stream`` is
+        set, shaped like the OpenAI SDK types.
+        """
+        pass
+    
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+# Pooled HTTP clients shared by every OpenAI backend, keyed by transport settings
+_shared_http_clients: Dict[Tuple[Any, ...], Any] = {}
+
+
+def shared_http_client(config: Config) -> Any:
+    """Return the process-wide ``httpx.AsyncClient`` for the configured transport.
+
+    Sessions with the same settings reuse one connection pool, so batch
+    workers and server sessions skip repeated TCP and TLS setup.
+    """
+    settings = (
+        config.http_max_connections,
+        config.http_max_keepalive,
+        config.http_keepalive_expiry,
+        config.http2,
+        config.http_connect_timeout,
+        config.http_timeout,
+    )
+    client = _shared_http_clients.get(settings)
+    if client is None:
+        import httpx
+        
+        client = _shared_http_clients[settings] = httpx.AsyncClient(
+            http2=config.http2,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=config.http_max_connections,
+                max_keepalive_connections=config.http_max_keepalive,
+                keepalive_expiry=config.http_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(config.http_timeout, connect=config.http_connect_timeout),
+        )
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close the shared HTTP clients and their pooled connections."""
+    clients = list(_shared_http_clients.values())
+    _shared_http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+class OpenAIBackend(ChatBackend):
+    """Backend calling the OpenAI chat completions API."""
+    
+    def __init__(self, config: Config, http_client: Any = None) -> None:
+        """Initialize the OpenAI SDK client on the shared connection pool."""
+        from openai import AsyncOpenAI
+        
+        http_client = http_client or shared_http_client(config)
+        self.client = AsyncOpenAI(
+            api_key=config.openai_api_key,
+            http_client=http_client,
+            # Retries are handled by the client's resilience layer
+            max_retries=0,
+            # The SDK passes its own timeout with every request, so keep them in sync
+            timeout=http_client.timeout,
+        )
+    
+    async def create(self, **params: Any) -> Any:
+        return await self.client.chat.completions.create(**params)
+
+
+class MockBackendError(RuntimeError):
+    """Error injected by the mock backend, shaped like a retryable HTTP 503."""
+    
+    status_code = 503
+
+
+# Minimal stand-ins for the OpenAI SDK response and chunk types
+
+@dataclass
+class MockFunction:
+    name: Optional[str] = None
+    arguments: Optional[str] = None
+
+
+@dataclass
+class MockToolCall:
+    id: Optional[str] = None
+    type: str = "function"
+    function: Optional[MockFunction] = None
+    index: Optional[int] = None
+
+
+@dataclass
+class MockMessage:
+    role: Optional[str] = "assistant"
+    content: Optional[str] = None
+    tool_calls: Optional[List[MockToolCall]] = None
+
+
+@dataclass
+class MockChoice:
+    index: int = 0
+    message: Optional[MockMessage] = None
+    delta: Optional[MockMessage] = None
+    finish_reason: Optional[str] = None
+
+
+@dataclass
+class MockUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+@dataclass
+class MockCompletion:
+    id: str = ""
+    model: str = ""
+    object: str = "chat.completion"
+    choices: List[MockChoice] = field(default_factory=list)
+    usage: Optional[MockUsage] = None
+
+
+class MockBackend(ChatBackend):
+    """Deterministic local stand-in for the OpenAI API.
+
+    For every new user prompt it first answers with the configured tool
+    calls (if any); once tool results follow, it answers with text built
+    from ``response_template``. Latency and errors can be injected to
+    exercise the client, registry and CLI without network access.
+    """
+    
+    def __init__(
+        self,
+        response_template: str = "Mock response to: {prompt}",
+        tool_calls: Optional[List[Dict[str, Any]]] = None,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        error_rate: float = 0.0,
+        chunk_size: int = 4,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the mock backend."""
+        self.response_template = response_template
+        self.tool_calls = tool_calls or []
+        self.latency = latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.chunk_size = max(1, chunk_size)
+        self._random = random.Random(seed)
+        self.requests = 0
+    
+    @classmethod
+    def from_config(cls, config: Config) -> "MockBackend":
+        """Create a mock backend from configuration values."""
+        tool_calls = json.loads(config.mock_tool_calls) if config.mock_tool_calls else []
+        return cls(
+            response_template=config.mock_response,
+            tool_calls=tool_calls,
+            latency=config.mock_latency,
+            token_latency=config.mock_token_latency,
+            error_rate=config.mock_error_rate,
+        )
+    
+    async def create(self, **params: Any) -> Any:
+        self.requests += 1
+        request_id = f"mock-{self.requests}"
+        
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise MockBackendError("Injected mock backend error")
+        
+        messages = params.get("messages", [])
+        message = self._reply(messages, request_id, bool(params.get("tools")))
+        
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        completion_tokens = len(message.content or "") // 4
+        usage = MockUsage(prompt_tokens, completion_tokens, prompt_tokens + completion_tokens)
+        
+        if params.get("stream"):
+            include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+            return self._stream(message, request_id, params.get("model", ""), usage if include_usage else None)
+        
+        return MockCompletion(
+            id=request_id,
+            model=params.get("model", ""),
+            choices=[MockChoice(
+                message=message,
+                finish_reason="tool_calls" if message.tool_calls else "stop",
+            )],
+            usage=usage,
+        )
+    
+    def _reply(self, messages: List[Dict[str, Any]], request_id: str, tools_offered: bool) -> MockMessage:
+        """Decide between tool calls and a text reply for the conversation so far."""
+        # Tool calls answer a fresh prompt; after tool results the mock replies in text
+        prompt_index = None
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].get("role") == "user":
+                prompt_index = index
+                break
+        
+        if prompt_index == len(messages) - 1 and tools_offered and self.tool_calls:
+            return MockMessage(tool_calls=[
+                MockToolCall(
+                    id=f"call_{request_id}_{index}",
+                    function=MockFunction(
+                        name=call["name"],
+                        arguments=json.dumps(call.get("arguments", {})),
+                    ),
+                )
+                for index, call in enumerate(self.tool_calls)
+            ])
+        
+        prompt = messages[prompt_index].get("content") or "" if prompt_index is not None else ""
+        return MockMessage(content=self.response_template.format(prompt=prompt))
+    
+    async def _stream(
+        self,
+        message: MockMessage,
+        request_id: str,
+        model: str,
+        usage: Optional[MockUsage] = None,
+    ) -> AsyncIterator[MockCompletion]:
+        """Emit a message as a sequence of streaming chunks."""
+        def chunk(delta: MockMessage, finish_reason: Optional[str] = None) -> MockCompletion:
+            return MockCompletion(
+                id=request_id,
+                model=model,
+                object="chat.completion.chunk",
+                choices=[MockChoice(delta=delta, finish_reason=finish_reason)],
+            )
+        
+        content = message.content or ""
+        for start in range(0, len(content), self.chunk_size):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield chunk(MockMessage(content=content[start:start + self.chunk_size]))
+        
+        for index, call in enumerate(message.tool_calls or []):
+            yield chunk(MockMessage(tool_calls=[MockToolCall(
+                index=index,
+                id=call.id,
+                function=MockFunction(name=call.function.name, arguments=""),
+            )]))
+            arguments = call.function.arguments or ""
+            for start in range(0, len(arguments), self.chunk_size):
+                if self.token_latency:
+                    await asyncio.sleep(self.token_latency)
+                yield chunk(MockMessage(tool_calls=[MockToolCall(
+                    index=index,
+                    function=MockFunction(arguments=arguments[start:start + self.chunk_size]),
+                )]))
+        
+        yield chunk(MockMessage(role=None), "tool_calls" if message.tool_calls else "stop")
+        
+        if usage is not None:
+            yield MockCompletion(id=request_id, model=model, object="chat.completion.chunk", usage=usage)
+
+
+def create_backend(config: Config) -> ChatBackend:
+    """Create the chat backend selected by the configuration."""
+    if config.backend == "openai":
+        return OpenAIBackend(config)
+    if config.backend == "mock":
+        return MockBackend.from_config(config)
+    raise ValueError(f"Unknown backend '{config.backend}'")
@@ -1,16 +1,119 @@
 """Base classes for the extensible tool system."""
 
+import importlib
+import json
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Protocol, TypeAlias
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Set, Tuple, TypeAlias
+
+from .config import Config
 
 # Type aliases for better readability
 ToolResult = TypeAlias = Dict[str, Any]
 ToolParameters = TypeAlias = Dict[str, Any]
 
+# Field name -> None (kept whole) or a nested schema for dict and list values
+ResultSchema = TypeAlias = Dict[str, Any]
+
+# Longest strings and lists kept at each step of shrinking an oversized result
+SHRINK_STEPS = ((1000, 20), (250, 5), (60, 2))
+
+
+def compact_json(value: Any) -> str:
+    """Minimal JSON: no whitespace and non-ASCII text kept as is."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def project_result(value: Any, schema: Optional[ResultSchema]) -> Any:
+    """Keep only the fields a result schema names, in schema order."""
+    if schema is None:
+        return value
+    if isinstance(value, list):
+        return [project_result(item, schema) for item in value]
+    if isinstance(value, dict):
+        return {key: project_result(value[key], nested) for key, nested in schema.items() if key in value}
+    return value
+
+
+def _shrink(value: Any, max_chars: int, max_items: int) -> Any:
+    """Cut long strings and lists, saying how much was left out."""
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "…"
+    if isinstance(value, dict):
+        return {key: _shrink(item, max_chars, max_items) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        kept = [_shrink(item, max_chars, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            kept.append(f"… {len(value) - max_items} more")
+        return kept
+    return value
+
+
+def fit_result(result: Any, max_bytes: int) -> str:
+    """Serialize a result as compact JSON no larger than ``max_bytes`` (0 for no limit).
+    
+    An oversized result has its strings and lists cut in steps and is
+    marked ``"truncated"``; if that is not enough, a prefix of the most
+    shrunk JSON is returned as a ``"preview"``.
+    """
+    text = compact_json(result)
+    if max_bytes <= 0 or len(text.encode("utf-8")) <= max_bytes:
+        return text
+    
+    for max_chars, max_items in SHRINK_STEPS:
+        shrunk = _shrink(result, max_chars, max_items)
+        if isinstance(shrunk, dict):
+            shrunk["truncated"] = True
+        shrunk_text = compact_json(shrunk)
+        if len(shrunk_text.encode("utf-8")) <= max_bytes:
+            return shrunk_text
+    
+    # Escaping grows the preview unevenly, so search for the longest prefix that fits
+    def envelope(length: int) -> str:
+        return compact_json({"truncated": True, "preview": shrunk_text[:length]})
+    
+    low, high = 0, len(shrunk_text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(envelope(middle).encode("utf-8")) <= max_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return envelope(low)
+
 
 class Tool(ABC):
     """Abstract base class for all tools."""
     
+    # Whether the registry may memoize results of identical calls
+    cacheable: bool = False
+    
+    # Whether calls only read data, so they may start speculatively and be discarded
+    side_effect_free: bool = False
+    
+    # How long a memoized result stays valid, in seconds
+    cache_ttl: float = 300.0
+    
+    # Words in a user message that make this tool relevant to the turn
+    keywords: Tuple[str, ...] = ()
+    
+    # Regular expression that also marks a message as relevant
+    relevance_pattern: Optional[str] = None
+    
+    # Where the registry runs the tool: "async" awaits ``execute`` on the event
+    # loop, "thread" (blocking I/O) and "process" (CPU-bound) run ``run`` in a pool
+    execution: str = "async"
+    
+    # Time limit in seconds for a call, capped by TOOL_TIMEOUT; None uses TOOL_TIMEOUT alone
+    timeout: Optional[float] = None
+    
+    # Fields of a result sent to the model; None sends every field
+    result_schema: Optional[ResultSchema] = None
+    
+    # Largest serialized result sent to the model, in bytes (0 for no limit)
+    max_result_bytes: int = 4096
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -33,6 +136,98 @@ class Tool(ABC):
     async def execute(self, **kwargs: Any) -> ToolResult:
         """Execute the tool with given parameters."""
         pass
+    
+    def configure(self, config: Config) -> None:
+        """Apply application settings; the registry calls this before first use."""
+        pass
+    
+    def run(self, **kwargs: Any) -> ToolResult:
+        """Synchronous body of a blocking or CPU-bound tool, run in a worker pool."""
+        raise NotImplementedError(f"Tool '{self.name}' has no synchronous run method")
+    
+    def should_offload(self, **kwargs: Any) -> bool:
+        """Whether this call is heavy enough to leave the event loop."""
+        return True
+    
+    def format_result(self, result: ToolResult) -> str:
+        """The result as the model sees it: projected onto ``result_schema`` and fit to ``max_result_bytes``."""
+        return fit_result(project_result(result, self.result_schema), self.max_result_bytes)
+    
+    def cache_key(self, **kwargs: Any) -> str:
+        """Key identifying calls that produce the same result."""
+        return json.dumps(kwargs, sort_keys=True, default=str)
+    
+    def is_relevant(self, message: str, words: Set[str]) -> bool:
+        """Whether the tool is likely needed for a message (``words`` is its lowercased words)."""
+        if words & set(self.name.lower().split("_")) or words & set(self.keywords):
+            return True
+        return bool(self.relevance_pattern and re.search(self.relevance_pattern, message))
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Static description of a tool, enough to offer it without importing it."""
+    
+    name: str
+    description: str
+    parameters: Dict[str, Any]
+    target: str  # "package.module:ToolClass"
+    keywords: Tuple[str, ...] = ()
+    relevance_pattern: Optional[str] = None
+    side_effect_free: bool = False
+    timeout: Optional[float] = None
+    
+    def load(self) -> Tool:
+        """Import the tool's module and instantiate the tool."""
+        module_name, _, attribute = self.target.partition(":")
+        tool_class = getattr(importlib.import_module(module_name), attribute)
+        return tool_class()
+
+
+class LazyTool(Tool):
+    """Stand-in for a tool whose module is imported on its first call."""
+    
+    def __init__(self, spec: ToolSpec) -> None:
+        """Initialize the stand-in from a spec."""
+        self.spec = spec
+        self.keywords = spec.keywords
+        self.relevance_pattern = spec.relevance_pattern
+        self.side_effect_free = spec.side_effect_free
+        self.timeout = spec.timeout
+        self._tool: Optional[Tool] = None
+    
+    @property
+    def name(self) -> str:
+        return self.spec.name
+    
+    @property
+    def description(self) -> str:
+        return self.spec.description
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return self.spec.parameters
+    
+    def resolve(self) -> Tool:
+        """Load the real tool, importing its module the first time."""
+        if self._tool is None:
+            self._tool = self.spec.load()
+            if self._tool.name != self.spec.name:
+                raise ValueError(
+                    f"Tool spec '{self.spec.name}' loaded a tool named '{self._tool.name}'"
+                )
+        return self._tool
+    
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        return await self.resolve().execute(**kwargs)
+    
+    def format_result(self, result: ToolResult) -> str:
+        return self.resolve().format_result(result)
+
+
+def message_words(message: str) -> Set[str]:
+    """Lowercased words of a message, as passed to ``Tool.is_relevant``."""
+    return set(re.findall(r"[a-z0-9]+", message.lower()))
 
 
 class ToolRegistry(Protocol):
@@ -42,6 +237,10 @@ class ToolRegistry(Protocol):
         """Register a tool."""
         ...
     
+    def unregister(self, name: str) -> None:
+        """Unregister a tool."""
+        ...
+    
     def get_tool(self, name: str) -> Tool | None:
         """Get a tool by name."""
         ...
@@ -50,6 +249,6 @@ class ToolRegistry(Protocol):
         """List all registered tools."""
         ...
     
-    def get_function_definitions(self) -> List[Dict[str, Any]]:
+    def get_function_definitions(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
         """Get function definitions for OpenAI API."""
         ...
@@ -0,0 +1,176 @@
+"""Non-interactive batch processing of prompts from JSONL files."""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .client import OpenAIClient
+from .config import Config
+
+BatchRecord = Tuple[str, Dict[str, Any]]
+
+
+@dataclass
+class BatchSummary:
+    """Counters describing a finished batch run."""
+    
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+    
+    @property
+    def mean_latency_ms(self) -> float:
+        """Mean per-record latency of processed records."""
+        if not self.latencies_ms:
+            return 0.0
+        return sum(self.latencies_ms) / len(self.latencies_ms)
+    
+    def percentile_latency_ms(self, percentile: float) -> float:
+        """Per-record latency at the given percentile (0-100)."""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+def load_checkpoint(output_path: str, include_failed: bool = False) -> Set[str]:
+    """Collect the ids of records already written to the output file.
+
+    Records that ended in an error are left out unless ``include_failed`` is
+    set, so a rerun retries them. A trailing partial line left by a crash is
+    truncated so that appending resumes on a clean record boundary.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+        
+        for line in data[:end].splitlines():
+            try:
+                result = json.loads(line)
+                if include_failed or "error" not in result:
+                    done.add(str(result["id"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    
+    return done
+
+
+def read_records(input_path: str) -> Iterator[Tuple[Optional[BatchRecord], Optional[str]]]:
+    """Lazily yield ``(record, error)`` pairs from a JSONL input file."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield None, f"line {line_number}: invalid JSON ({e})"
+                continue
+            
+            if not isinstance(record, dict) or not isinstance(record.get("prompt"), str):
+                yield None, f"line {line_number}: record needs a string 'prompt'"
+                continue
+            
+            yield (str(record.get("id", line_number)), record), None
+
+
+async def _process_record(client: OpenAIClient, record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one prompt through a fresh conversation and time it."""
+    client.conversation_history.clear()
+    result: Dict[str, Any] = {"id": record_id, "prompt": record["prompt"]}
+    
+    start = time.perf_counter()
+    try:
+        response = await client.chat_completion(record["prompt"])
+        result["response"] = await client.process_response(response)
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    
+    return result
+
+
+async def run_batch(
+    config: Config,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    resume: bool = True,
+    retry_failed: bool = True,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> BatchSummary:
+    """Process every prompt in ``input_path`` and append results to ``output_path``.
+
+    Records are streamed from the input and handled by ``concurrency`` workers,
+    each owning one ``OpenAIClient`` whose history is reset per record. Results
+    are written as soon as they complete, so the output file doubles as the
+    checkpoint: rerunning with ``resume`` skips ids already present in it,
+    except those that failed when ``retry_failed`` is set.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    
+    summary = BatchSummary()
+    done = load_checkpoint(output_path, include_failed=not retry_failed) if resume else set()
+    queue: "asyncio.Queue[Optional[BatchRecord]]" = asyncio.Queue(maxsize=concurrency * 2)
+    
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        
+        def write(result: Dict[str, Any]) -> None:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            if on_result is not None:
+                on_result(result)
+        
+        async def worker() -> None:
+            client = OpenAIClient(config)
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                
+                result = await _process_record(client, *item)
+                if "error" in result:
+                    summary.failed += 1
+                else:
+                    summary.completed += 1
+                summary.latencies_ms.append(result["latency_ms"])
+                write(result)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for item, error in read_records(input_path):
+                if item is None:
+                    summary.invalid += 1
+                    if on_result is not None:
+                        on_result({"error": error})
+                    continue
+                
+                if item[0] in done:
+                    summary.skipped += 1
+                    continue
+                
+                await queue.put(item)
+            
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+    
+    return summary
@@ -0,0 +1,347 @@
+"""Content-addressed caching and coalescing of chat completion responses."""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import Config
+
+CacheEntry = Tuple[float, Dict[str, Any]]
+
+# Request parameters that determine the completion and therefore the cache key
+KEY_FIELDS = ("model", "temperature", "messages", "tools", "tool_choice")
+
+
+def request_key(params: Dict[str, Any], tools_digest: Optional[str] = None) -> str:
+    """Hash the completion-relevant request parameters into a stable key.
+    
+    A precomputed ``tools_digest`` stands in for the tool definitions so they
+    do not have to be serialized again for every request.
+    """
+    normalized = {
+        field: params[field]
+        for field in KEY_FIELDS
+        if params.get(field) is not None
+    }
+    if tools_digest is not None and "tools" in normalized:
+        normalized["tools"] = tools_digest
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier (memory LRU and on-disk) cache for completion responses."""
+    
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 86400.0,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 100 * 1024 * 1024,
+    ) -> None:
+        """Initialize the cache; the disk tier is disabled without a directory."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = Path(directory).expanduser() if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        # Disk writes and removals run in worker threads
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+    
+    @classmethod
+    def from_config(cls, config: Config) -> "CompletionCache":
+        """Create a cache from configuration values."""
+        return cls(
+            max_entries=config.cache_max_entries,
+            ttl=config.cache_ttl,
+            directory=config.cache_dir or None,
+            max_disk_bytes=config.cache_max_disk_mb * 1024 * 1024,
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier sizes."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes or 0,
+        }
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a response, checking memory first and then disk."""
+        value = self._memory_get(key)
+        if value is None and self.directory is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._memory_set(key, entry)
+                value = entry[1]
+        
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response in both tiers."""
+        entry = (time.time() + self.ttl, value)
+        self._memory_set(key, entry)
+        if self.directory is not None:
+            await asyncio.to_thread(self._disk_set, key, entry)
+    
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        self._memory.clear()
+    
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._memory[key]
+            return None
+        
+        self._memory.move_to_end(key)
+        return value
+    
+    def _memory_set(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+    
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if data.get("expires_at", 0) < time.time():
+            self._disk_remove(path)
+            return None
+        return data["expires_at"], data["response"]
+    
+    def _disk_set(self, key: str, entry: CacheEntry) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        payload = json.dumps({"expires_at": entry[0], "response": entry[1]}, default=str)
+        
+        with self._disk_lock:
+            # Measure the directory before the new file is in it
+            usage = self._disk_usage()
+            previous = path.stat().st_size if path.exists() else 0
+            
+            # Write atomically so concurrent readers never see a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            
+            self._disk_bytes = usage + len(payload) - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_evict()
+    
+    def _disk_usage(self) -> int:
+        """Bytes of cache files on disk, counted on first use and tracked from then on."""
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(
+                path.stat().st_size for path in self.directory.glob("*/*.json")
+            )
+        return self._disk_bytes
+    
+    def _disk_remove(self, path: Path) -> None:
+        with self._disk_lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                return
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+    
+    def _disk_evict(self) -> None:
+        """Remove expired files, then the oldest ones, until under 90% of the limit.
+        
+        Called with the disk lock held.
+        """
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for mtime, size, path in files:
+            if total <= target and mtime + self.ttl >= now:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
+
+
+class ToolResultCache:
+    """Bounded TTL cache of tool results that also shares in-flight calls.
+    
+    Concurrent lookups of the same key await a single execution instead of
+    each running the tool; the execution is cancelled once every caller
+    waiting on it has left, so a hung call does not hold its key after its
+    callers time out. Failed executions are not cached.
+    """
+    
+    def __init__(self, max_entries: int = 256) -> None:
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._flights = SingleFlight()
+        self.hits = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters."""
+        return {
+            "hits": self.hits,
+            "misses": self._flights.executions,
+            "shared": self._flights.shared,
+            "entries": len(self._results),
+        }
+    
+    async def get_or_run(
+        self,
+        key: str,
+        ttl: float,
+        run: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Return the cached result for ``key`` or compute it with ``run``."""
+        entry = self._results.get(key)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self._results.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._results[key]
+        
+        result, _ = await self._flights.do(key, lambda: self._run(key, ttl, run))
+        return result
+    
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._results.clear()
+    
+    async def _run(self, key: str, ttl: float, run: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        result = await run()
+        self._results[key] = (time.monotonic() + ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return result
+
+
+class SingleFlight:
+    """Runs one execution for concurrent calls with the same key.
+    
+    The first caller starts the execution as a task and later callers with
+    the key await the same task, so they all get its result or its error.
+    A cancelled caller leaves without disturbing the others; the execution
+    is cancelled only once every caller waiting on it has left. Nothing is
+    kept after the execution finishes.
+    """
+    
+    def __init__(self) -> None:
+        """Initialize with nothing in flight."""
+        # Per key: the shared task and how many callers await it
+        self._calls: Dict[str, Tuple["asyncio.Task[Any]", List[int]]] = {}
+        self.executions = 0
+        self.shared = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return execution counters."""
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
+    
+    async def do(self, key: str, run: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await the in-flight execution for ``key``, starting it with ``run`` if there is none.
+        
+        Returns the result and whether this call joined an execution started by another.
+        """
+        call = self._calls.get(key)
+        # A task of another event loop (an earlier asyncio.run) cannot be awaited here
+        shared = call is not None and call[0].get_loop() is asyncio.get_running_loop()
+        if call is not None and shared:
+            self.shared += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(run())
+            call = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda done: self._finish(key, done))
+        
+        task, waiters = call
+        waiters[0] += 1
+        try:
+            # Shield so one cancelled caller does not cancel the shared execution
+            return await asyncio.shield(task), shared
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                self._finish(key, task)
+                task.cancel()
+    
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        if task.done() and not task.cancelled():
+            task.exception()  # retrieved by the callers, or by nobody if they all left
+
+
+_shared_caches: Dict[Tuple[Any, ...], CompletionCache] = {}
+
+
+def shared_completion_cache(config: Config) -> CompletionCache:
+    """Return the process-wide cache for the given configuration."""
+    settings = (
+        config.cache_max_entries,
+        config.cache_ttl,
+        config.cache_dir,
+        config.cache_max_disk_mb,
+    )
+    cache = _shared_caches.get(settings)
+    if cache is None:
+        cache = _shared_caches[settings] = CompletionCache.from_config(config)
+    return cache
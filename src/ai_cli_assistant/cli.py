@@ -1,36 +1,53 @@
 """CLI interface for AI CLI Assistant."""
 
+import argparse
 import asyncio
 import sys
-from typing import Optional
+from typing import Any, Awaitable, Dict, List, Optional
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Prompt
-from rich.text import Text
-
-from .client import OpenAIClient
+from .backends import close_http_clients
+from .batch import run_batch
+from .client import OpenAIClient, completion_flights
 from .config import Config
 from .registry import registry
-from .tools import CalculatorTool, WeatherTool, WebSearchTool
+from .store import close_conversation_stores
+from .tracing import tracer
+from .tools import BUILTIN_TOOLS
+
+
+class _LazyConsole:
+    """Proxy that creates the rich console on first use, keeping imports fast."""
+    
+    _console: Any = None
+    
+    def __getattr__(self, name: str) -> Any:
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
 
-console = Console()
+console = _LazyConsole()
 
 
-def setup_tools() -> None:
-    """Register all available tools."""
-    tools = [
-        CalculatorTool(),
-        WeatherTool(),
-        WebSearchTool(),
-    ]
+def setup_tools(discover_plugins: bool = True) -> None:
+    """Register all available tools.
     
-    for tool in tools:
-        registry.register(tool)
+    Tools are registered from their specs; each tool's module is imported
+    the first time the model calls it.
+    """
+    for spec in BUILTIN_TOOLS:
+        registry.register_spec(spec)
+    
+    if discover_plugins:
+        registry.discover()
 
 
 def show_help() -> None:
     """Display help information."""
+    from rich.panel import Panel
+    
     help_text = """
 [bold blue]AI CLI Assistant[/bold blue]
 
@@ -39,6 +56,7 @@ Available commands:
 • [green]tools[/green] - List available tools
 • [green]exit[/green] or [green]quit[/green] - Exit the application
 • [green]clear[/green] - Clear conversation history
+• [green]stats[/green] - Show latency, token and cache statistics
 
 Just type your message to chat with the AI assistant!
     """
@@ -47,6 +65,8 @@ Just type your message to chat with the AI assistant!
 
 def list_tools() -> None:
     """List all available tools."""
+    from rich.panel import Panel
+    
     tools = registry.list_tools()
     
     if not tools:
@@ -61,8 +81,76 @@ def list_tools() -> None:
     console.print(Panel(tool_list, title="Available Tools", border_style="green"))
 
 
+def show_stats(client: OpenAIClient) -> None:
+    """Display tracing and cache statistics."""
+    from rich.table import Table
+    
+    if not tracer.enabled:
+        console.print("[yellow]Tracing is disabled (TRACING_ENABLED=false)[/yellow]")
+        return
+    
+    stats = tracer.stats()
+    
+    latency = Table(title="Latency (ms)", border_style="blue")
+    latency.add_column("Span")
+    for column in ("count", "mean", "p50", "p95", "p99"):
+        latency.add_column(column, justify="right")
+    for name, summary in stats["latency"].items():
+        latency.add_row(
+            name,
+            str(summary["count"]),
+            *(f"{summary[key] * 1000:.1f}" for key in ("mean", "p50", "p95", "p99")),
+        )
+    console.print(latency)
+    
+    counters = Table(title="Counters", border_style="blue")
+    counters.add_column("Counter")
+    counters.add_column("Value", justify="right")
+    for name, value in stats["counters"].items():
+        counters.add_row(name, f"{value:g}")
+    if client.cache is not None:
+        for name, value in client.cache.stats().items():
+            counters.add_row(f"completion_cache.{name}", f"{value:g}")
+    for name, value in completion_flights.stats().items():
+        counters.add_row(f"completion_flights.{name}", f"{value:g}")
+    if client.semantic_cache is not None:
+        for name, value in client.semantic_cache.stats().items():
+            counters.add_row(f"semantic_cache.{name}", f"{value:g}")
+    if registry.result_cache is not None:
+        for name, value in registry.result_cache.stats().items():
+            counters.add_row(f"tool_cache.{name}", f"{value:g}")
+    console.print(counters)
+
+
+async def stream_reply(client: OpenAIClient, user_input: str) -> None:
+    """Render the assistant reply token by token as it streams in."""
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.spinner import Spinner
+    from rich.text import Text
+    
+    text = Text()
+    panel = Panel(text, title="[bold green]Assistant[/bold green]", border_style="green")
+    
+    with Live(
+        Spinner("dots", text="[bold green]AI is thinking..."),
+        console=console,
+        refresh_per_second=20,
+    ) as live:
+        async for delta in client.chat_stream(user_input):
+            if not text:
+                live.update(panel)
+            text.append(delta)
+        
+        if not text:
+            live.update(panel)
+
+
 async def chat_loop(client: OpenAIClient) -> None:
     """Main chat loop."""
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+    
     console.print(Panel(
         "[bold blue]AI CLI Assistant[/bold blue]\nType 'help' for commands, 'exit' to quit",
         border_style="blue"
@@ -83,11 +171,18 @@ async def chat_loop(client: OpenAIClient) -> None:
             elif user_input.lower() == "tools":
                 list_tools()
                 continue
+            elif user_input.lower() == "stats":
+                show_stats(client)
+                continue
             elif user_input.lower() == "clear":
                 client.conversation_history.clear()
                 console.print("[green]Conversation history cleared[/green]")
                 continue
             
+            if client.config.stream_responses:
+                await stream_reply(client, user_input)
+                continue
+            
             # Show typing indicator
             with console.status("[bold green]AI is thinking..."):
                 response = await client.chat(user_input)
@@ -106,21 +201,164 @@ async def chat_loop(client: OpenAIClient) -> None:
             console.print(f"[red]Error: {e}[/red]")
 
 
-def main() -> None:
+async def batch_command(config: Config, args: argparse.Namespace) -> None:
+    """Run a batch of prompts and report progress."""
+    from rich.panel import Panel
+    
+    counts = {"done": 0, "errors": 0}
+    
+    with console.status("[bold green]Processing batch...") as status:
+        def on_result(result: Dict[str, Any]) -> None:
+            counts["done"] += 1
+            if "error" in result:
+                counts["errors"] += 1
+            status.update(
+                f"[bold green]Processed {counts['done']} records "
+                f"({counts['errors']} errors)..."
+            )
+        
+        summary = await run_batch(
+            config,
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            resume=not args.no_resume,
+            retry_failed=not args.skip_failed,
+            on_result=on_result,
+        )
+    
+    console.print(Panel(
+        f"Completed: [green]{summary.completed}[/green]\n"
+        f"Failed: [red]{summary.failed}[/red]\n"
+        f"Invalid records: [yellow]{summary.invalid}[/yellow]\n"
+        f"Skipped (checkpoint): {summary.skipped}\n"
+        f"Latency mean/p50/p95: {summary.mean_latency_ms:.0f} / "
+        f"{summary.percentile_latency_ms(50):.0f} / "
+        f"{summary.percentile_latency_ms(95):.0f} ms",
+        title="Batch Summary",
+        border_style="blue",
+    ))
+
+
+def index_command(config: Config, args: argparse.Namespace) -> None:
+    """Update the on-disk search index used by the web_search tool."""
+    from .tools.search_index import SearchIndex, read_documents
+    
+    if not config.search_index_dir:
+        raise ValueError("SEARCH_INDEX_DIR must be set to build a search index")
+    
+    index = SearchIndex(config.search_index_dir)
+    with console.status("[bold green]Indexing documents..."):
+        added = index.add(read_documents(args.paths)) if args.paths else 0
+        deleted = index.delete(args.delete) if args.delete else 0
+        if args.compact:
+            index.compact()
+    
+    console.print(
+        f"[green]Indexed {added} documents, deleted {deleted}; "
+        f"{len(index)} documents in {len(index.segments)} segments[/green]"
+    )
+
+
+async def serve_command(config: Config, args: argparse.Namespace) -> None:
+    """Run the multi-session server until interrupted."""
+    from .server import AssistantServer
+    
+    server = AssistantServer(config)
+    address = await server.start(
+        socket_path=args.socket or config.server_socket or None,
+        host=args.host or config.server_host,
+        port=args.port if args.port is not None else config.server_port,
+    )
+    console.print(f"[bold green]Serving on {address}[/bold green] (Ctrl+C to stop)")
+    await server.serve_forever()
+
+
+async def run_session(session: Awaitable[None]) -> None:
+    """Run a CLI session, then close the pooled HTTP connections."""
+    try:
+        await session
+    finally:
+        await close_conversation_stores()
+        await close_http_clients()
+        registry.shutdown()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="ai-cli", description="AI CLI Assistant")
+    parser.add_argument(
+        "--session",
+        help="Name of a conversation to resume and keep in the conversation store (needs STORE_DIR)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch = subparsers.add_parser("batch", help="Run prompts from a JSONL file")
+    batch.add_argument("input", help="JSONL file with one {\"id\", \"prompt\"} record per line")
+    batch.add_argument("-o", "--output", required=True, help="JSONL file to append results to")
+    batch.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent sessions")
+    batch.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Overwrite the output instead of skipping records already in it",
+    )
+    batch.add_argument(
+        "--skip-failed",
+        action="store_true",
+        help="When resuming, skip records that failed instead of retrying them",
+    )
+    
+    index = subparsers.add_parser("index", help="Add documents to the local search index")
+    index.add_argument(
+        "paths",
+        nargs="*",
+        help="JSONL files of {\"id\", \"title\", \"url\", \"text\"} records, or text files",
+    )
+    index.add_argument("--delete", nargs="+", metavar="ID", default=[], help="Document ids to remove")
+    index.add_argument("--compact", action="store_true", help="Merge the index into a single segment")
+    
+    serve = subparsers.add_parser("serve", help="Serve many conversations over a local socket")
+    serve.add_argument("--socket", help="Unix socket path (default: TCP on --host/--port)")
+    serve.add_argument("--host", help="Address to bind for HTTP (default: SERVER_HOST)")
+    serve.add_argument("--port", type=int, help="Port to bind for HTTP (default: SERVER_PORT)")
+    
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Main entry point for the CLI."""
+    args = build_parser().parse_args(argv)
+    
     try:
         # Load configuration
         config = Config.from_env()
         config.validate()
+        tracer.configure(config)
+        registry.configure(config)
         
         # Setup tools
-        setup_tools()
+        setup_tools(discover_plugins=config.tool_plugins)
+        
+        if args.command == "batch":
+            asyncio.run(run_session(batch_command(config, args)))
+            return
+        
+        if args.command == "index":
+            index_command(config, args)
+            return
+        
+        if args.command == "serve":
+            try:
+                asyncio.run(run_session(serve_command(config, args)))
+            except KeyboardInterrupt:
+                console.print("\n[yellow]Server stopped[/yellow]")
+            return
         
         # Create client
-        client = OpenAIClient(config)
+        client = OpenAIClient(config, conversation_id=args.session)
         
         # Run chat loop
-        asyncio.run(chat_loop(client))
+        asyncio.run(run_session(chat_loop(client)))
         
     except ValueError as e:
         console.print(f"[red]Configuration error: {e}[/red]")
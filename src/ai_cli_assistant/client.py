@@ -2,130 +2,736 @@
 
 import asyncio
 import json
-from typing import Any, Dict, List, Optional
-
-from openai import AsyncOpenAI
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+from .backends import ChatBackend, create_backend
+from .cache import CompletionCache, SingleFlight, request_key, shared_completion_cache
 from .config import Config
+from .history import ChatMessage, ConversationHistory, ToolCall
 from .registry import registry
+from .semantic_cache import SemanticCache, shared_semantic_cache
+from .store import shared_conversation_store
+from .tracing import RunningStats, tracer
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# A tool call started while its response was still streaming: name, arguments and task
+Speculation = Tuple[str, Dict[str, Any], "asyncio.Future[Tuple[Any, Optional[Exception]]]"]
+
+# Completions observed before hedging starts, and the latency percentile it waits for
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a backend error is transient: a retryable status, timeout or connection error."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # The OpenAI SDK's connection and timeout errors carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked to wait before retrying, if it said so."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter; waiting callers are served in order."""
+    
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Initialize a full bucket refilled at ``rate`` tokens per second."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """Take a token, waiting for the refill if the bucket is empty.
+        
+        Returns False without taking one if the wait would last ``max_wait``
+        seconds or more. A caller cancelled while waiting gives its token back.
+        """
+        self._refill()
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if max_wait is not None and wait >= max_wait:
+            return False
+        
+        # Reserve the token now; a negative balance is the queue ahead of us
+        self._tokens -= 1
+        if self._tokens < 0:
+            try:
+                await asyncio.sleep(-self._tokens / self.rate)
+            except asyncio.CancelledError:
+                self._tokens += 1
+                raise
+        return True
+    
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right away."""
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+# Process-wide rate limiters keyed by their settings, and completion latencies for hedging
+_shared_limiters: Dict[Tuple[float, int], TokenBucket] = {}
+_completion_latency = RunningStats()
+
+# Non-streaming completions in flight in this process, keyed by request hash
+completion_flights = SingleFlight()
+
+
+def shared_rate_limiter(config: Config) -> Optional[TokenBucket]:
+    """Return the process-wide limiter for the configured rate, or None if unlimited."""
+    if config.rate_limit_rps <= 0:
+        return None
+    settings = (config.rate_limit_rps, config.rate_limit_burst)
+    limiter = _shared_limiters.get(settings)
+    if limiter is None:
+        limiter = _shared_limiters[settings] = TokenBucket(*settings)
+    return limiter
+
+
+def usage_dict(usage: Any) -> Optional[Dict[str, int]]:
+    """Token counts of an SDK usage object, or None if the response had none."""
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+
+
+class TurnBudgetExceeded(RuntimeError):
+    """Raised when a turn runs out of its time or token budget mid tool loop."""
 
 
 class OpenAIClient:
     """OpenAI client wrapper for the AI CLI Assistant."""
     
-    def __init__(self, config: Config) -> None:
-        """Initialize the OpenAI client."""
+    def __init__(
+        self,
+        config: Config,
+        backend: Optional[ChatBackend] = None,
+        conversation_id: Optional[str] = None,
+    ) -> None:
+        """Initialize the OpenAI client, resuming a stored conversation if given.
+        
+        The log is read on the calling thread; code sharing an event loop with
+        other sessions should use ``resume`` instead.
+        """
         self.config = config
-        self.client = AsyncOpenAI(api_key=config.openai_api_key)
-        self.conversation_history: List[Dict[str, Any]] = []
+        self.backend = backend or create_backend(config)
+        self.conversation_history = ConversationHistory(
+            token_budget=config.context_token_budget,
+            summarize=config.summarize_history,
+        )
+        store = shared_conversation_store(config)
+        if store is not None and conversation_id is not None:
+            self.conversation_history.attach(store.open(conversation_id))
+        self.cache: Optional[CompletionCache] = (
+            shared_completion_cache(config) if config.use_completion_cache else None
+        )
+        self.semantic_cache: Optional[SemanticCache] = shared_semantic_cache(config)
+        self.limiter = shared_rate_limiter(config)
+        self._turn_rounds = 0
+        self._turn_tool_rounds = 0
+        self._turn_tokens = 0
+        self._turn_started = time.perf_counter()
+        self._turn_tools: Optional[List[str]] = None
+        self._speculations: Dict[str, Speculation] = {}
+        self._speculation_slots = asyncio.Semaphore(config.max_concurrent_tools)
+    
+    async def resume(self, conversation_id: str) -> None:
+        """Resume a stored conversation, reading its log in a worker thread."""
+        store = shared_conversation_store(self.config)
+        if store is not None:
+            log, tail = await store.resume(conversation_id, self.conversation_history.token_budget)
+            self.conversation_history.attach(log, tail)
     
     def add_message(self, role: str, content: str) -> None:
         """Add a message to the conversation history."""
-        self.conversation_history.append({"role": role, "content": content})
-    
-    def add_function_call(self, name: str, arguments: Dict[str, Any], result: Any) -> None:
-        """Add a function call and its result to the conversation history."""
-        # Add the function call
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": None,
-            "function_call": {
-                "name": name,
-                "arguments": json.dumps(arguments) if isinstance(arguments, dict) else str(arguments)
-            }
-        })
-        
-        # Add the function result
-        self.conversation_history.append({
-            "role": "function",
-            "name": name,
-            "content": str(result)
-        })
+        self.conversation_history.append(ChatMessage(role, content))
     
-    async def chat_completion(
-        self, 
-        message: str, 
-        use_functions: bool = True
-    ) -> Dict[str, Any]:
-        """Get a chat completion from OpenAI."""
-        # Add user message to history
+    def add_tool_results(self, message: ChatMessage, results: List[str]) -> None:
+        """Add an assistant message with tool calls and one tool-role result per call."""
+        self.conversation_history.append(message)
+        for tool_call, result in zip(message.tool_calls, results):
+            self.conversation_history.append(ChatMessage("tool", result, tool_call_id=tool_call.id))
+    
+    def _start_turn(self, message: str) -> None:
+        """Reset the per-turn budgets, select the turn's tools and record the prompt."""
+        self._turn_rounds = 0
+        self._turn_tool_rounds = 0
+        self._turn_tokens = 0
+        self._turn_started = time.perf_counter()
+        self._turn_tools = None
+        if self.config.tool_selection == "relevant":
+            self._turn_tools = registry.select_tools(message)
+        
         self.add_message("user", message)
+    
+    def _turn_time_left(self) -> Optional[float]:
+        """Seconds left in the turn's time budget, or None if it has none."""
+        if not self.config.turn_timeout:
+            return None
+        return self.config.turn_timeout - (time.perf_counter() - self._turn_started)
+    
+    def _time_budget_exceeded(self) -> TurnBudgetExceeded:
+        """Count and build the error for a turn that ran out of time."""
+        tracer.count("turn.budget_exceeded")
+        return TurnBudgetExceeded(
+            f"turn exceeded its {self.config.turn_timeout:g}s time budget "
+            f"after {self._turn_tool_rounds} tool rounds"
+        )
+    
+    def _check_turn_budget(self) -> None:
+        """Raise TurnBudgetExceeded if the turn ran out of time or tokens."""
+        time_left = self._turn_time_left()
+        if time_left is not None and time_left <= 0:
+            raise self._time_budget_exceeded()
+        
+        if self.config.turn_token_budget and self._turn_tokens >= self.config.turn_token_budget:
+            tracer.count("turn.budget_exceeded")
+            raise TurnBudgetExceeded(
+                f"turn exceeded its {self.config.turn_token_budget} token budget "
+                f"after {self._turn_tool_rounds} tool rounds"
+            )
+    
+    def _count_turn_tokens(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Add a completion's tokens to the turn, estimating them when not reported."""
+        if usage and usage.get("total_tokens"):
+            self._turn_tokens += usage["total_tokens"]
+        else:
+            self._turn_tokens += self.conversation_history.token_count
+    
+    def _request_params(self, message: Optional[str], use_functions: bool) -> Dict[str, Any]:
+        """Build the chat completion parameters, starting a new turn for a message."""
+        if message is not None:
+            self._start_turn(message)
+        self._turn_rounds += 1
+        
+        # Past the round limit the model has to answer with what it has
+        if use_functions and self._turn_tool_rounds >= self.config.max_tool_rounds:
+            tracer.count("turn.round_limit")
+            use_functions = False
         
-        # Prepare messages for API call
-        messages = self.conversation_history.copy()
+        # The history is already trimmed to the context budget, so send it as is
+        messages = self.conversation_history.messages
         
-        # Prepare function definitions if needed
+        # Prepare function definitions if needed; the registry caches them
         tools = None
         if use_functions:
-            tools = registry.get_function_definitions()
+            tools = registry.get_function_definitions(self._turn_tools)
+        
+        return {
+            "model": self.config.openai_model,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": "auto" if use_functions else None,
+            "temperature": self.config.openai_temperature,
+        }
+    
+    def _cache_key(self, params: Dict[str, Any]) -> str:
+        """Cache key for a request, hashing the tools via the registry's digest."""
+        tools_digest = registry.definitions_digest(self._turn_tools) if params["tools"] else None
+        return request_key(params, tools_digest)
+    
+    async def _create(self, params: Dict[str, Any], **extra: Any) -> Any:
+        """Call the backend with rate limiting, retries and, for plain requests, hedging.
+        
+        Transient errors are retried with jittered exponential backoff, or after
+        the delay a retry-after hint asks for. Streams are retried only while
+        opening them, never once chunks have been consumed. Attempts, the
+        waits between them and the wait for a rate-limit token are bounded by
+        the turn's remaining time budget.
+        """
+        hedge = self.config.hedge_requests and not extra.get("stream")
+        attempt = 0
+        while True:
+            time_left = self._turn_time_left()
+            if self.limiter is not None and not await self.limiter.acquire(time_left):
+                raise self._time_budget_exceeded()
+            
+            time_left = self._turn_time_left()
+            if time_left is not None and time_left <= 0:
+                raise self._time_budget_exceeded()
+            
+            start = time.perf_counter()
+            try:
+                async with asyncio.timeout(time_left):
+                    if hedge:
+                        response = await self._hedged_create(params)
+                    else:
+                        response = await self.backend.create(**params, **extra)
+            except Exception as e:
+                time_left = self._turn_time_left()
+                if time_left is not None and time_left <= 0:
+                    raise self._time_budget_exceeded() from e
+                if attempt >= self.config.max_retries or not is_retryable(e):
+                    raise
+                
+                delay = retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.config.retry_base_delay, self.config.retry_max_delay)
+                if time_left is not None and delay >= time_left:
+                    raise self._time_budget_exceeded() from e
+                attempt += 1
+                tracer.count("completion.retries")
+                await asyncio.sleep(delay)
+                continue
+            
+            if not extra.get("stream"):
+                _completion_latency.add(time.perf_counter() - start)
+            return response
+    
+    async def _hedged_create(self, params: Dict[str, Any]) -> Any:
+        """Send a backup request when the first is slower than the p95 latency.
         
+        The first successful response wins and the other request is cancelled.
+        A hedge needs a free rate-limit token, so hedging never adds to a 429 storm.
+        """
+        primary = asyncio.ensure_future(self.backend.create(**params))
+        tasks = {primary}
         try:
-            response = await self.client.chat.completions.create(
-                model=self.config.openai_model,
-                messages=messages,
-                tools=tools,
-                tool_choice="auto" if use_functions else None,
-                temperature=self.config.openai_temperature,
-            )
+            if _completion_latency.count >= HEDGE_MIN_SAMPLES:
+                threshold = _completion_latency.percentile(HEDGE_PERCENTILE)
+                await asyncio.wait(tasks, timeout=threshold)
+                if not primary.done() and (self.limiter is None or self.limiter.try_acquire()):
+                    tracer.count("completion.hedges")
+                    tasks.add(asyncio.ensure_future(self.backend.create(**params)))
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Every request failed; report the primary's error
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark a losing request's error as retrieved
+    
+    async def chat_completion(
+        self, 
+        message: Optional[str], 
+        use_functions: bool = True
+    ) -> ChatMessage:
+        """Get a chat completion from OpenAI and return its first choice's message.
+        
+        A ``message`` starts a new turn; ``None`` continues the current turn
+        after its tool results were added to the history.
+        """
+        params = self._request_params(message, use_functions)
+        
+        with tracer.span("completion", model=params["model"], stream=False) as span:
+            cache_key = None
+            if self.cache is not None or self.config.use_request_coalescing:
+                cache_key = self._cache_key(params)
+            if self.cache is not None:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    span["cached"] = True
+                    tracer.count("completion.cache_hits")
+                    return self._first_message(cached)
             
-            return response.model_dump()
+            if self.config.use_request_coalescing:
+                # The shared request may outlive this turn, so it gets its own message list
+                shared_params = dict(params, messages=list(params["messages"]))
+                (reply, usage), shared = await completion_flights.do(
+                    cache_key, lambda: self._complete(shared_params, cache_key)
+                )
+                if shared:
+                    span["coalesced"] = True
+                    tracer.count("completion.coalesced")
+            else:
+                reply, usage = await self._complete(params, cache_key)
             
+            if usage:
+                span["prompt_tokens"] = usage.get("prompt_tokens")
+                span["completion_tokens"] = usage.get("completion_tokens")
+            self._count_turn_tokens(usage)
+        
+        return reply
+    
+    async def _complete(
+        self, params: Dict[str, Any], cache_key: Optional[str]
+    ) -> Tuple[ChatMessage, Optional[Dict[str, int]]]:
+        """Request a completion, record its usage and cache it; returns the reply and usage."""
+        try:
+            response = await self._create(params)
+        except TurnBudgetExceeded:
+            raise
         except Exception as e:
             raise RuntimeError(f"OpenAI API error: {e}")
-    
-    async def process_response(self, response: Dict[str, Any]) -> str:
-        """Process the OpenAI response and handle function calls."""
-        choices = response.get("choices", [])
-        if not choices:
+        if not response.choices:
             raise ValueError("No choices in OpenAI response")
         
-        choice = choices[0]
-        message = choice.get("message", {})
+        # Read the few fields needed straight from the SDK objects
+        reply = ChatMessage.from_sdk(response.choices[0].message)
+        usage = usage_dict(response.usage)
+        if usage:
+            tracer.record_usage(usage)
         
-        # Check if there's a function call
-        if "tool_calls" in message and message["tool_calls"]:
-            # Handle function calls
-            results = []
-            for tool_call in message["tool_calls"]:
-                function_name = tool_call["function"]["name"]
-                arguments = tool_call["function"]["arguments"]
-                
-                # Parse arguments if they're a string
-                if isinstance(arguments, str):
-                    import json
-                    try:
-                        arguments = json.loads(arguments)
-                    except json.JSONDecodeError:
-                        arguments = {}
+        if self.cache is not None and cache_key is not None:
+            await self.cache.set(cache_key, {"choices": [{"message": reply.wire}]})
+        
+        return reply, usage
+    
+    async def chat_completion_stream(
+        self,
+        message: Optional[str],
+        use_functions: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat completion from OpenAI.
+        
+        Yields ``{"type": "content", "delta": str}`` events as text arrives and
+        finishes with a single ``{"type": "message", "message": ChatMessage}``
+        event holding the assembled assistant message, including any tool
+        calls whose argument fragments were stitched back together.
+        """
+        params = self._request_params(message, use_functions)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(params)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                tracer.count("completion.cache_hits")
+                cached_message = self._first_message(cached)
+                if cached_message.content:
+                    yield {"type": "content", "delta": cached_message.content}
+                yield {"type": "message", "message": cached_message}
+                return
+        
+        speculate = self.config.speculative_tools
+        content_parts: List[str] = []
+        # Per tool-call index: its id and the name and argument fragments
+        tool_calls: Dict[int, Tuple[List[Optional[str]], List[str], List[str]]] = {}
+        usage = None
+        
+        with tracer.span("completion", model=params["model"], stream=True) as span:
+            start = time.perf_counter()
+            try:
+                stream = await self._create(
+                    params,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
                 
-                # Execute the tool
-                try:
-                    result = await registry.execute_tool(function_name, **arguments)
-                    results.append(f"{function_name}: {result}")
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        usage = usage_dict(chunk.usage)
+                        span["prompt_tokens"] = usage.get("prompt_tokens")
+                        span["completion_tokens"] = usage.get("completion_tokens")
+                        tracer.record_usage(usage)
                     
-                    # Add to conversation history
-                    self.add_function_call(function_name, arguments, result)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
                     
-                except Exception as e:
-                    results.append(f"{function_name}: Error - {e}")
-            
-            # Get a follow-up response
-            follow_up = await self.chat_completion(
-                f"Function calls completed: {', '.join(results)}"
-            )
-            return await self.process_response(follow_up)
+                    if delta.content:
+                        if not content_parts:
+                            ttft = time.perf_counter() - start
+                            span["ttft_ms"] = round(ttft * 1000, 3)
+                            tracer.observe("completion.ttft", ttft)
+                        content_parts.append(delta.content)
+                        yield {"type": "content", "delta": delta.content}
+                    
+                    for fragment in delta.tool_calls or []:
+                        call_id, name_parts, argument_parts = tool_calls.setdefault(
+                            fragment.index, ([None], [], [])
+                        )
+                        if fragment.id:
+                            call_id[0] = fragment.id
+                        if fragment.function is not None:
+                            if fragment.function.name:
+                                name_parts.append(fragment.function.name)
+                            if fragment.function.arguments:
+                                argument_parts.append(fragment.function.arguments)
+                                # Only a closing brace can complete a JSON object
+                                if speculate and "}" in fragment.function.arguments:
+                                    self._speculate(call_id[0], "".join(name_parts), "".join(argument_parts))
+                                    
+            except TurnBudgetExceeded:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"OpenAI API error: {e}")
+            self._count_turn_tokens(usage)
+        
+        assembled = ChatMessage(
+            "assistant",
+            "".join(content_parts) or None,
+            [
+                ToolCall(call_id[0], "".join(name_parts), "".join(argument_parts))
+                for call_id, name_parts, argument_parts in (tool_calls[index] for index in sorted(tool_calls))
+            ],
+        )
+        
+        if cache_key is not None:
+            await self.cache.set(cache_key, {"choices": [{"message": assembled.wire}]})
+        
+        yield {"type": "message", "message": assembled}
+    
+    async def _run_tool(
+        self, name: str, arguments: Dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> Tuple[Any, Optional[Exception]]:
+        """Execute a single tool call, returning its result or the error raised."""
+        timeout = self.config.tool_timeout
+        tool_timeout = registry.tool_timeout(name)
+        if tool_timeout is not None:
+            timeout = min(timeout, tool_timeout)
+        time_left = self._turn_time_left()
+        if time_left is not None:
+            # A tool may not outlive the turn's remaining time budget
+            timeout = max(0.0, min(timeout, time_left))
+        
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    registry.execute_tool(name, **arguments),
+                    timeout=timeout,
+                )
+                return result, None
+            except asyncio.TimeoutError:
+                tracer.count("tool.timeouts")
+                return None, TimeoutError(f"timed out after {timeout:g}s")
+            except Exception as e:
+                return None, e
+    
+    def _speculate(self, call_id: Optional[str], name: str, arguments: str) -> None:
+        """Start a side-effect-free tool call whose streamed arguments just became complete JSON."""
+        if not call_id or call_id in self._speculations or not registry.is_side_effect_free(name):
+            return
+        try:
+            parsed = json.loads(arguments)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(parsed, dict):
+            return
+        
+        tracer.count("tool.speculated")
+        task = asyncio.ensure_future(self._run_tool(name, parsed, self._speculation_slots))
+        self._speculations[call_id] = (name, parsed, task)
+    
+    def _take_speculations(
+        self, message: ChatMessage, calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Optional["asyncio.Future[Tuple[Any, Optional[Exception]]]"]]:
+        """Claim the speculative runs matching the final calls and discard the rest."""
+        prefetched = []
+        for tool_call, (name, arguments) in zip(message.tool_calls, calls):
+            speculation = self._speculations.pop(tool_call.id, None) if tool_call.id else None
+            if speculation is not None and speculation[:2] == (name, arguments):
+                tracer.count("tool.speculation_hits")
+                prefetched.append(speculation[2])
+            else:
+                if speculation is not None:
+                    self._speculations[tool_call.id] = speculation
+                prefetched.append(None)
+        self._discard_speculations()
+        return prefetched
+    
+    def _discard_speculations(self) -> None:
+        """Cancel speculative runs whose calls the model did not make after all."""
+        speculations, self._speculations = self._speculations, {}
+        for _, _, task in speculations.values():
+            tracer.count("tool.speculation_discarded")
+            task.cancel()
+    
+    async def execute_tool_calls(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        prefetched: Optional[List[Optional["asyncio.Future[Tuple[Any, Optional[Exception]]]"]]] = None,
+    ) -> List[Tuple[Any, Optional[Exception]]]:
+        """Execute tool calls, concurrently when enabled, preserving call order.
+        
+        A call with a ``prefetched`` run (started speculatively) awaits it instead.
+        """
+        limit = self.config.max_concurrent_tools if self.config.parallel_tool_calls else 1
+        semaphore = asyncio.Semaphore(limit)
+        return await asyncio.gather(*(
+            task if task is not None else self._run_tool(name, arguments, semaphore)
+            for (name, arguments), task in zip(calls, prefetched or [None] * len(calls))
+        ))
+    
+    async def handle_tool_calls(self, message: ChatMessage) -> List[str]:
+        """Execute the tool calls of an assistant message and record their results."""
+        calls = []
+        for tool_call in message.tool_calls:
+            try:
+                arguments = json.loads(tool_call.arguments)
+            except json.JSONDecodeError:
+                arguments = {}
+            calls.append((tool_call.name, arguments))
+        
+        tracer.count("tool.calls", len(calls))
+        outcomes = await self.execute_tool_calls(calls, self._take_speculations(message, calls))
+        
+        # Every call gets a result, in the original call order
+        results = []
+        for (function_name, _), (result, error) in zip(calls, outcomes):
+            if error is not None:
+                results.append(f"Error: {error}")
+            elif isinstance(result, str):
+                results.append(result)
+            else:
+                results.append(registry.format_result(function_name, result))
+        
+        self._turn_tool_rounds += 1
+        self.add_tool_results(message, results)
+        return results
+    
+    async def process_response(self, message: ChatMessage) -> str:
+        """Run tool rounds until the model answers in text or the turn's budget runs out."""
+        while message.tool_calls:
+            self._check_turn_budget()
+            await self.handle_tool_calls(message)
+            message = await self.chat_completion(None)
         
         # Regular response
-        content = message.get("content", "")
+        content = message.content or ""
         if content:
             self.add_message("assistant", content)
         
         return content
     
+    @staticmethod
+    def _first_message(response: Dict[str, Any]) -> ChatMessage:
+        """The message of a cached completion's first choice."""
+        choices = response.get("choices", [])
+        if not choices:
+            raise ValueError("No choices in OpenAI response")
+        return ChatMessage.from_wire(choices[0].get("message") or {})
+    
+    def _semantic_context(self) -> Optional[str]:
+        """The system prompts a context-free turn's answer depends on, or None if the turn has context."""
+        if self.semantic_cache is None or not self.conversation_history.context_free:
+            return None
+        return "\n".join(record.content or "" for record in self.conversation_history.records)
+    
+    def _semantic_lookup(self, message: str, context: Optional[str]) -> Optional[str]:
+        """Answer a context-free prompt from the semantic cache, recording the turn on a hit."""
+        if context is None:
+            return None
+        
+        answer = self.semantic_cache.lookup(message, context)
+        if answer is None:
+            return None
+        
+        tracer.count("turn.semantic_cache_hits")
+        self._start_turn(message)
+        self.add_message("assistant", answer)
+        return answer
+    
     async def chat(self, message: str) -> str:
         """Complete chat interaction with function calling support."""
+        with tracer.span("turn", stream=False) as span:
+            try:
+                context = self._semantic_context()
+                answer = self._semantic_lookup(message, context)
+                if answer is not None:
+                    span["cached"] = True
+                    return answer
+                
+                response = await self.chat_completion(message)
+                answer = await self.process_response(response)
+                if context is not None:
+                    self.semantic_cache.store(message, answer, context)
+                return answer
+            except Exception as e:
+                return f"Error: {e}"
+            finally:
+                span["rounds"] = self._turn_rounds
+    
+    async def chat_stream(self, message: str) -> AsyncIterator[str]:
+        """Streaming chat interaction, yielding text deltas as they arrive."""
+        with tracer.span("turn", stream=True) as span:
+            try:
+                context = self._semantic_context()
+                answer = self._semantic_lookup(message, context)
+                if answer is not None:
+                    span["cached"] = True
+                    yield answer
+                    return
+                
+                async for delta in self._stream_rounds(message):
+                    yield delta
+                
+                last = self.conversation_history.records[-1]
+                if context is not None and last.role == "assistant" and not last.tool_calls:
+                    self.semantic_cache.store(message, last.content or "", context)
+            except Exception as e:
+                yield f"Error: {e}"
+            finally:
+                span["rounds"] = self._turn_rounds
+    
+    async def _stream_rounds(self, message: str) -> AsyncIterator[str]:
+        """Stream the turn's completions, running tool calls between rounds."""
+        prompt: Optional[str] = message
         try:
-            response = await self.chat_completion(message)
-            return await self.process_response(response)
-        except Exception as e:
-            return f"Error: {e}"
+            while True:
+                assembled = ChatMessage("assistant")
+                async for event in self.chat_completion_stream(prompt):
+                    if event["type"] == "content":
+                        yield event["delta"]
+                    else:
+                        assembled = event["message"]
+                prompt = None
+                
+                if not assembled.tool_calls:
+                    break
+                self._check_turn_budget()
+                await self.handle_tool_calls(assembled)
+        finally:
+            # Nothing started for a failed or abandoned round may outlive it
+            self._discard_speculations()
+        
+        content = assembled.content
+        if content:
+            self.add_message("assistant", content)
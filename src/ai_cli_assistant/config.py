@@ -4,10 +4,13 @@ import os
 from dataclasses import dataclass
 from typing import Optional
 
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+def _env_bool(name: str, default: Optional[bool]) -> Optional[bool]:
+    """Read a boolean flag from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
 @dataclass
@@ -17,12 +20,74 @@ class Config:
     openai_api_key: str
     openai_model: str = "gpt-4o-mini"
     openai_temperature: float = 0.7
+    parallel_tool_calls: bool = True
+    max_concurrent_tools: int = 4
+    speculative_tools: bool = True
+    tool_timeout: float = 30.0
+    tool_process_workers: int = 0
+    tool_thread_workers: int = 0
+    max_tool_rounds: int = 8
+    turn_timeout: float = 120.0
+    turn_token_budget: int = 32000
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    http_connect_timeout: float = 5.0
+    http_timeout: float = 60.0
+    max_retries: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    rate_limit_rps: float = 0.0
+    rate_limit_burst: int = 10
+    hedge_requests: bool = False
+    coalesce_requests: Optional[bool] = None
+    stream_responses: bool = True
+    context_token_budget: int = 8000
+    summarize_history: bool = True
+    cache_enabled: Optional[bool] = None
+    cache_dir: str = "~/.cache/ai-cli-assistant"
+    cache_ttl: float = 86400.0
+    cache_max_entries: int = 512
+    cache_max_disk_mb: int = 100
+    semantic_cache: bool = False
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_max_entries: int = 1024
+    semantic_cache_ttl: float = 3600.0
+    backend: str = "openai"
+    mock_response: str = "Mock response to: {prompt}"
+    mock_tool_calls: str = ""
+    mock_latency: float = 0.0
+    mock_token_latency: float = 0.0
+    mock_error_rate: float = 0.0
+    tool_selection: str = "all"
+    tool_plugins: bool = True
+    search_index_dir: str = ""
+    weather_dataset: str = ""
+    weather_cache_ttl: float = 600.0
+    store_dir: str = ""
+    store_flush_interval: float = 1.0
+    store_fsync: bool = True
+    server_socket: str = ""
+    server_host: str = "127.0.0.1"
+    server_port: int = 8765
+    session_idle_timeout: float = 1800.0
+    max_sessions: int = 1000
+    tracing_enabled: bool = True
+    trace_export_path: str = ""
+    trace_export_format: str = "jsonl"
     
     @classmethod
     def from_env(cls) -> "Config":
         """Create configuration from environment variables."""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        from dotenv import load_dotenv
+        
+        # Load environment variables from .env file
+        load_dotenv()
+        
+        backend = os.getenv("LLM_BACKEND", "openai").lower()
+        api_key = os.getenv("OPENAI_API_KEY", "")
+        if not api_key and backend == "openai":
             raise ValueError(
                 "OPENAI_API_KEY environment variable is required. "
                 "Please set it in your .env file or environment."
@@ -30,13 +95,86 @@ class Config:
         
         return cls(
             openai_api_key=api_key,
+            backend=backend,
             openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
             openai_temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
+            parallel_tool_calls=_env_bool("PARALLEL_TOOL_CALLS", True),
+            max_concurrent_tools=int(os.getenv("MAX_CONCURRENT_TOOLS", "4")),
+            speculative_tools=_env_bool("SPECULATIVE_TOOLS", True),
+            tool_timeout=float(os.getenv("TOOL_TIMEOUT", "30.0")),
+            tool_process_workers=int(os.getenv("TOOL_PROCESS_WORKERS", "0")),
+            tool_thread_workers=int(os.getenv("TOOL_THREAD_WORKERS", "0")),
+            max_tool_rounds=int(os.getenv("MAX_TOOL_ROUNDS", "8")),
+            turn_timeout=float(os.getenv("TURN_TIMEOUT", "120")),
+            turn_token_budget=int(os.getenv("TURN_TOKEN_BUDGET", "32000")),
+            http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+            http2=_env_bool("HTTP2", False),
+            http_connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            http_timeout=float(os.getenv("HTTP_TIMEOUT", "60")),
+            max_retries=int(os.getenv("MAX_RETRIES", "3")),
+            retry_base_delay=float(os.getenv("RETRY_BASE_DELAY", "0.5")),
+            retry_max_delay=float(os.getenv("RETRY_MAX_DELAY", "30")),
+            rate_limit_rps=float(os.getenv("RATE_LIMIT_RPS", "0")),
+            rate_limit_burst=int(os.getenv("RATE_LIMIT_BURST", "10")),
+            hedge_requests=_env_bool("HEDGE_REQUESTS", False),
+            coalesce_requests=_env_bool("COALESCE_REQUESTS", None),
+            stream_responses=_env_bool("STREAM_RESPONSES", True),
+            context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000")),
+            summarize_history=_env_bool("SUMMARIZE_HISTORY", True),
+            cache_enabled=_env_bool("CACHE_ENABLED", None),
+            cache_dir=os.getenv("CACHE_DIR", "~/.cache/ai-cli-assistant"),
+            cache_ttl=float(os.getenv("CACHE_TTL", "86400")),
+            cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "512")),
+            cache_max_disk_mb=int(os.getenv("CACHE_MAX_DISK_MB", "100")),
+            semantic_cache=_env_bool("SEMANTIC_CACHE", False),
+            semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            semantic_cache_max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1024")),
+            semantic_cache_ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            mock_response=os.getenv("MOCK_RESPONSE", "Mock response to: {prompt}"),
+            mock_tool_calls=os.getenv("MOCK_TOOL_CALLS", ""),
+            mock_latency=float(os.getenv("MOCK_LATENCY", "0")),
+            mock_token_latency=float(os.getenv("MOCK_TOKEN_LATENCY", "0")),
+            mock_error_rate=float(os.getenv("MOCK_ERROR_RATE", "0")),
+            tool_selection=os.getenv("TOOL_SELECTION", "all").lower(),
+            tool_plugins=_env_bool("TOOL_PLUGINS", True),
+            search_index_dir=os.getenv("SEARCH_INDEX_DIR", ""),
+            weather_dataset=os.getenv("WEATHER_DATASET", ""),
+            weather_cache_ttl=float(os.getenv("WEATHER_CACHE_TTL", "600")),
+            store_dir=os.getenv("STORE_DIR", ""),
+            store_flush_interval=float(os.getenv("STORE_FLUSH_INTERVAL", "1.0")),
+            store_fsync=_env_bool("STORE_FSYNC", True),
+            server_socket=os.getenv("SERVER_SOCKET", ""),
+            server_host=os.getenv("SERVER_HOST", "127.0.0.1"),
+            server_port=int(os.getenv("SERVER_PORT", "8765")),
+            session_idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+            max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+            tracing_enabled=_env_bool("TRACING_ENABLED", True),
+            trace_export_path=os.getenv("TRACE_EXPORT_PATH", ""),
+            trace_export_format=os.getenv("TRACE_EXPORT_FORMAT", "jsonl").lower(),
         )
     
+    @property
+    def use_completion_cache(self) -> bool:
+        """Whether completions are cached; defaults to on only for temperature 0."""
+        if self.cache_enabled is None:
+            return self.openai_temperature == 0
+        return self.cache_enabled
+    
+    @property
+    def use_request_coalescing(self) -> bool:
+        """Whether identical in-flight completions share one request; defaults to on only for temperature 0."""
+        if self.coalesce_requests is None:
+            return self.openai_temperature == 0
+        return self.coalesce_requests
+    
     def validate(self) -> None:
         """Validate configuration values."""
-        if not self.openai_api_key:
+        if self.backend not in ("openai", "mock"):
+            raise ValueError(f"Unknown backend '{self.backend}'")
+        
+        if not self.openai_api_key and self.backend == "openai":
             raise ValueError("OpenAI API key is required")
         
         if not (0.0 <= self.openai_temperature <= 2.0):
@@ -44,3 +182,63 @@ class Config:
         
         if not self.openai_model:
             raise ValueError("OpenAI model is required")
+        
+        if self.max_concurrent_tools < 1:
+            raise ValueError("Max concurrent tools must be at least 1")
+        
+        if self.tool_timeout <= 0:
+            raise ValueError("Tool timeout must be positive")
+        
+        if self.tool_process_workers < 0 or self.tool_thread_workers < 0:
+            raise ValueError("Tool worker counts must not be negative")
+        
+        if self.max_tool_rounds < 0:
+            raise ValueError("Max tool rounds must not be negative")
+        
+        if self.turn_timeout < 0 or self.turn_token_budget < 0:
+            raise ValueError("Turn budgets must not be negative")
+        
+        if self.http_max_connections < 1 or self.http_max_keepalive < 0:
+            raise ValueError("HTTP pool needs at least 1 connection and no negative keep-alive limit")
+        
+        if self.http_connect_timeout <= 0 or self.http_timeout <= 0:
+            raise ValueError("HTTP timeouts must be positive")
+        
+        if self.max_retries < 0 or self.retry_base_delay < 0 or self.retry_max_delay < 0:
+            raise ValueError("Retry settings must not be negative")
+        
+        if self.rate_limit_rps < 0 or self.rate_limit_burst < 1:
+            raise ValueError("Rate limit must not be negative and its burst must be at least 1")
+        
+        if self.context_token_budget <= 0:
+            raise ValueError("Context token budget must be positive")
+        
+        if self.cache_max_entries < 1:
+            raise ValueError("Cache max entries must be at least 1")
+        
+        if self.cache_ttl <= 0:
+            raise ValueError("Cache TTL must be positive")
+        
+        if not (0.0 < self.semantic_cache_threshold <= 1.0):
+            raise ValueError("Semantic cache threshold must be above 0.0 and at most 1.0")
+        
+        if self.semantic_cache_max_entries < 1 or self.semantic_cache_ttl <= 0:
+            raise ValueError("Semantic cache needs at least 1 entry and a positive TTL")
+        
+        if not (0.0 <= self.mock_error_rate <= 1.0):
+            raise ValueError("Mock error rate must be between 0.0 and 1.0")
+        
+        if self.tool_selection not in ("all", "relevant"):
+            raise ValueError("Tool selection must be 'all' or 'relevant'")
+        
+        if self.weather_cache_ttl < 0:
+            raise ValueError("Weather cache TTL must not be negative")
+        
+        if self.store_flush_interval < 0:
+            raise ValueError("Store flush interval must not be negative")
+        
+        if self.session_idle_timeout <= 0 or self.max_sessions < 1:
+            raise ValueError("Session idle timeout must be positive and max sessions at least 1")
+        
+        if self.trace_export_format not in ("jsonl", "prometheus"):
+            raise ValueError("Trace export format must be 'jsonl' or 'prometheus'")
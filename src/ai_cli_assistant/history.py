@@ -0,0 +1,313 @@
+"""Conversation history bounded by an approximate token budget."""
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .store import ConversationLog
+
+Message = Dict[str, Any]
+
+# Fixed per-message overhead the chat format adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of earlier conversation:"
+
+# Keys of a message in the API's wire format
+WIRE_KEYS = frozenset({"role", "content", "tool_calls", "tool_call_id"})
+
+
+def estimate_tokens(message: Message) -> int:
+    """Approximate the token cost of a message (roughly four characters per token)."""
+    chars = len(message.get("content") or "")
+    
+    function_call = message.get("function_call")
+    if function_call:
+        chars += len(function_call.get("name", "")) + len(function_call.get("arguments", ""))
+    
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function", {})
+        chars += len(function.get("name", "")) + len(function.get("arguments", ""))
+    
+    return MESSAGE_OVERHEAD_TOKENS + (chars + 3) // 4
+
+
+class ToolCall:
+    """A function call requested by the model."""
+    
+    __slots__ = ("id", "name", "arguments", "_wire")
+    
+    def __init__(self, id: Optional[str], name: str, arguments: str) -> None:
+        """Initialize the call; empty arguments become ``"{}"``."""
+        self.id = id
+        self.name = name
+        self.arguments = arguments or "{}"
+        self._wire: Optional[Dict[str, Any]] = None
+    
+    @classmethod
+    def from_wire(cls, data: Dict[str, Any]) -> "ToolCall":
+        """Parse a call in the API's JSON format."""
+        function = data.get("function") or {}
+        return cls(data.get("id"), function.get("name") or "", function.get("arguments") or "")
+    
+    @classmethod
+    def from_sdk(cls, call: Any) -> "ToolCall":
+        """Read a call from an SDK tool-call object."""
+        return cls(call.id, call.function.name or "", call.function.arguments or "")
+    
+    @property
+    def wire(self) -> Dict[str, Any]:
+        """The call in the API's JSON format, built once."""
+        if self._wire is None:
+            self._wire = {
+                "id": self.id,
+                "type": "function",
+                "function": {"name": self.name, "arguments": self.arguments},
+            }
+        return self._wire
+
+
+class ChatMessage:
+    """One conversation message, converted to the API's wire format once and cached.
+    
+    Responses are read straight from SDK objects with ``from_sdk``; messages
+    loaded from a cache or log keep the dict they came from as their wire form.
+    """
+    
+    __slots__ = ("role", "content", "tool_calls", "tool_call_id", "_wire")
+    
+    def __init__(
+        self,
+        role: str,
+        content: Optional[str] = None,
+        tool_calls: Iterable[ToolCall] = (),
+        tool_call_id: Optional[str] = None,
+    ) -> None:
+        """Initialize the message."""
+        self.role = role
+        self.content = content
+        self.tool_calls: Tuple[ToolCall, ...] = tuple(tool_calls)
+        self.tool_call_id = tool_call_id
+        self._wire: Optional[Message] = None
+    
+    @classmethod
+    def from_wire(cls, data: Message) -> "ChatMessage":
+        """Wrap a message in the API's JSON format, reusing the dict as its wire form if it has no other keys."""
+        message = cls(
+            data.get("role") or "assistant",
+            data.get("content"),
+            [ToolCall.from_wire(call) for call in data.get("tool_calls") or ()],
+            data.get("tool_call_id"),
+        )
+        if data.keys() <= WIRE_KEYS:
+            message._wire = data
+        return message
+    
+    @classmethod
+    def from_sdk(cls, message: Any) -> "ChatMessage":
+        """Read the fields of an SDK message object without dumping it to dicts."""
+        return cls(
+            message.role or "assistant",
+            message.content,
+            [ToolCall.from_sdk(call) for call in message.tool_calls or ()],
+        )
+    
+    def estimate_tokens(self) -> int:
+        """Approximate token cost, as ``estimate_tokens`` gives for the wire form."""
+        chars = len(self.content or "")
+        for call in self.tool_calls:
+            chars += len(call.name) + len(call.arguments)
+        return MESSAGE_OVERHEAD_TOKENS + (chars + 3) // 4
+    
+    @property
+    def wire(self) -> Message:
+        """The message in the API's JSON format, built once."""
+        if self._wire is None:
+            wire: Message = {"role": self.role, "content": self.content}
+            if self.tool_calls:
+                wire["tool_calls"] = [call.wire for call in self.tool_calls]
+            if self.tool_call_id is not None:
+                wire["tool_call_id"] = self.tool_call_id
+            self._wire = wire
+        return self._wire
+
+
+class ConversationHistory:
+    """Message list that trims its oldest turns to stay within a token budget.
+
+    Messages are trimmed a whole turn at a time (a user message and every
+    assistant, tool call and tool result message after it), so tool calls
+    are always kept or dropped together with their results. Leading system messages
+    are never trimmed. When ``summarize`` is set, trimmed user turns are
+    condensed into a single system note so the model keeps some context.
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = 8000,
+        summarize: bool = True,
+        summary_chars: int = 400,
+    ) -> None:
+        """Initialize an empty history."""
+        if token_budget <= 0:
+            raise ValueError("Token budget must be positive")
+        
+        self.token_budget = token_budget
+        self.summarize = summarize
+        self.summary_chars = summary_chars
+        self._records: List[ChatMessage] = []
+        self._messages: List[Message] = []
+        self._tokens: List[int] = []
+        self._total_tokens = 0
+        self._summary_index: Optional[int] = None
+        self._summary_topics: List[str] = []
+        self.log: Optional["ConversationLog"] = None
+    
+    @property
+    def messages(self) -> List[Message]:
+        """The live list of wire-format messages, suitable for sending without a copy."""
+        return self._messages
+    
+    @property
+    def records(self) -> List[ChatMessage]:
+        """The retained messages as records, parallel to ``messages``."""
+        return self._records
+    
+    @property
+    def context_free(self) -> bool:
+        """Whether the history holds nothing but its leading system prompts."""
+        return self._summary_index is None and self._protected_prefix() == len(self._records)
+    
+    @property
+    def token_count(self) -> int:
+        """Approximate token count of the retained messages."""
+        return self._total_tokens
+    
+    def __len__(self) -> int:
+        return len(self._messages)
+    
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._messages)
+    
+    def __getitem__(self, index: int) -> Message:
+        return self._messages[index]
+    
+    def attach(self, log: "ConversationLog", tail: Optional[List[Message]] = None) -> None:
+        """Resume from the tail of a persistent log and record new messages to it.
+        
+        ``tail`` is the log's tail for this history's budget if it was already read.
+        """
+        self.log = None
+        self.clear()
+        self.extend(log.tail(self.token_budget) if tail is None else tail)
+        self.log = log
+    
+    def append(self, message: Union[ChatMessage, Message]) -> None:
+        """Add a message and trim older turns if the budget is exceeded."""
+        record = message if isinstance(message, ChatMessage) else ChatMessage.from_wire(message)
+        wire = record.wire
+        tokens = record.estimate_tokens()
+        if self.log is not None:
+            self.log.append(wire, tokens)
+        self._records.append(record)
+        self._messages.append(wire)
+        self._tokens.append(tokens)
+        self._total_tokens += tokens
+        self._enforce_budget()
+    
+    def extend(self, messages: Iterable[Union[ChatMessage, Message]]) -> None:
+        """Add several messages in order."""
+        for message in messages:
+            self.append(message)
+    
+    def clear(self) -> None:
+        """Remove all messages, starting a persistent log over as well."""
+        if self.log is not None:
+            self.log.reset()
+        self._records.clear()
+        self._messages.clear()
+        self._tokens.clear()
+        self._total_tokens = 0
+        self._summary_index = None
+        self._summary_topics.clear()
+    
+    def _protected_prefix(self) -> int:
+        """Number of leading messages (system prompts and summary) never trimmed."""
+        index = 0
+        while index < len(self._records) and self._records[index].role == "system":
+            index += 1
+        return index
+    
+    def _group_end(self, start: int) -> int:
+        """Index just past the turn starting at ``start``."""
+        end = start + 1
+        while end < len(self._records) and self._records[end].role != "user":
+            end += 1
+        return end
+    
+    def _enforce_budget(self) -> None:
+        """Drop the oldest turns until the history fits the budget."""
+        while self._total_tokens > self.token_budget:
+            start = self._protected_prefix()
+            
+            # Always keep the current turn, even if it alone exceeds the budget
+            current_turn = len(self._messages) - 1
+            while current_turn > start and self._records[current_turn].role != "user":
+                current_turn -= 1
+            
+            end = start
+            dropped_tokens = 0
+            while end < current_turn and self._total_tokens - dropped_tokens > self.token_budget:
+                group_end = self._group_end(end)
+                dropped_tokens += sum(self._tokens[end:group_end])
+                end = group_end
+            
+            if end == start:
+                return
+            
+            dropped = self._records[start:end]
+            del self._records[start:end]
+            del self._messages[start:end]
+            del self._tokens[start:end]
+            self._total_tokens -= dropped_tokens
+            
+            if self.summarize:
+                self._update_summary(dropped)
+    
+    def _update_summary(self, dropped: List[ChatMessage]) -> None:
+        """Fold the user turns of dropped messages into the summary note."""
+        for message in dropped:
+            if message.role == "user" and message.content:
+                self._summary_topics.append(" ".join(message.content.split())[:80])
+        
+        if not self._summary_topics:
+            return
+        
+        # Keep the most recent topics that fit within the summary size
+        limit = min(self.summary_chars, self.token_budget)
+        topics: List[str] = []
+        size = 0
+        for topic in reversed(self._summary_topics):
+            if size + len(topic) > limit:
+                break
+            topics.insert(0, topic)
+            size += len(topic)
+        self._summary_topics = topics
+        
+        summary = ChatMessage(
+            "system",
+            f"{SUMMARY_PREFIX} the user previously asked about: " + json.dumps(topics, ensure_ascii=False),
+        )
+        tokens = summary.estimate_tokens()
+        
+        if self._summary_index is None:
+            self._summary_index = self._protected_prefix()
+            self._records.insert(self._summary_index, summary)
+            self._messages.insert(self._summary_index, summary.wire)
+            self._tokens.insert(self._summary_index, tokens)
+        else:
+            self._total_tokens -= self._tokens[self._summary_index]
+            self._records[self._summary_index] = summary
+            self._messages[self._summary_index] = summary.wire
+            self._tokens[self._summary_index] = tokens
+        self._total_tokens += tokens
@@ -1,23 +1,124 @@
 """Tool registry system for dynamic tool discovery and registration."""
 
-from typing import Any, Dict, List
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import signal
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from .base import Tool
+from .base import LazyTool, Tool, ToolResult, ToolSpec, compact_json, message_words
+from .cache import ToolResultCache
+from .config import Config
+from .tracing import tracer
+
+
+# Entry-point group third-party packages use to contribute tools
+ENTRY_POINT_GROUP = "ai_cli_assistant.tools"
+
+
+class DefinitionsPayload(NamedTuple):
+    """Precompiled function definitions for a set of tools."""
+    
+    definitions: List[Dict[str, Any]]
+    serialized: str
+    digest: str
 
 
 class ToolRegistry:
     """Registry for managing tools."""
     
-    def __init__(self) -> None:
+    def __init__(self, memoize: bool = True, max_cached_results: int = 256) -> None:
         """Initialize the tool registry."""
         self._tools: Dict[str, Tool] = {}
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._payloads: Dict[Optional[Tuple[str, ...]], DefinitionsPayload] = {}
+        self._version = 0
+        self.result_cache: Optional[ToolResultCache] = (
+            ToolResultCache(max_cached_results) if memoize else None
+        )
+        self.config: Optional[Config] = None
+        self.process_workers: Optional[int] = None
+        self.thread_workers: Optional[int] = None
+        self._pools: Dict[str, Executor] = {}
+        self._worker_pids: Any = None
+        self._process_calls = 0
+        self._process_stuck = False
+    
+    def configure(self, config: Config) -> None:
+        """Apply the configuration to the worker pools and every loaded tool."""
+        self.config = config
+        self.process_workers = config.tool_process_workers or None
+        self.thread_workers = config.tool_thread_workers or None
+        for tool in self._tools.values():
+            if not isinstance(tool, LazyTool):
+                tool.configure(config)
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
         if tool.name in self._tools:
             raise ValueError(f"Tool '{tool.name}' is already registered")
         
+        if self.config is not None and not isinstance(tool, LazyTool):
+            tool.configure(self.config)
+        
         self._tools[tool.name] = tool
+        self._definitions[tool.name] = {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.parameters,
+            }
+        }
+        self._invalidate()
+    
+    def register_spec(self, spec: ToolSpec) -> None:
+        """Register a tool whose module is imported only when it is first executed."""
+        self.register(LazyTool(spec))
+    
+    def discover(self, group: str = ENTRY_POINT_GROUP) -> List[str]:
+        """Register tools advertised through package entry points.
+        
+        An entry point may name a ``ToolSpec`` (registered lazily), a ``Tool``
+        subclass or a ``Tool`` instance. Returns the names registered.
+        """
+        from importlib.metadata import entry_points
+        
+        registered = []
+        for entry_point in entry_points(group=group):
+            target = entry_point.load()
+            if isinstance(target, ToolSpec):
+                self.register_spec(target)
+                registered.append(target.name)
+                continue
+            
+            tool = target() if isinstance(target, type) else target
+            if not isinstance(tool, Tool):
+                raise ValueError(f"Entry point '{entry_point.name}' is not a tool or tool spec")
+            self.register(tool)
+            registered.append(tool.name)
+        return registered
+    
+    def unregister(self, name: str) -> None:
+        """Unregister a tool."""
+        if name not in self._tools:
+            raise ValueError(f"Tool '{name}' is not registered")
+        
+        del self._tools[name]
+        del self._definitions[name]
+        self._invalidate()
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever the set of tools changes."""
+        return self._version
+    
+    def _invalidate(self) -> None:
+        self._version += 1
+        self._payloads.clear()
     
     def get_tool(self, name: str) -> Tool | None:
         """Get a tool by name."""
@@ -27,19 +128,60 @@ class ToolRegistry:
         """List all registered tools."""
         return list(self._tools.values())
     
-    def get_function_definitions(self) -> List[Dict[str, Any]]:
-        """Get function definitions for OpenAI API."""
-        return [
-            {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.parameters,
-                }
-            }
-            for tool in self._tools.values()
-        ]
+    def _payload(self, names: Optional[Iterable[str]]) -> DefinitionsPayload:
+        """Build, or reuse, the definitions payload for all tools or a subset."""
+        key = None
+        if names is not None:
+            wanted = set(names)
+            key = tuple(name for name in self._tools if name in wanted)
+        
+        payload = self._payloads.get(key)
+        if payload is None:
+            definitions = [
+                self._definitions[name]
+                for name in (self._tools if key is None else key)
+            ]
+            serialized = json.dumps(definitions, sort_keys=True, separators=(",", ":"))
+            payload = DefinitionsPayload(
+                definitions,
+                serialized,
+                hashlib.sha256(serialized.encode("utf-8")).hexdigest(),
+            )
+            self._payloads[key] = payload
+        
+        return payload
+    
+    def get_function_definitions(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get function definitions for OpenAI API.
+        
+        The list is cached until a tool is registered or unregistered, so
+        callers must not modify it. ``names`` restricts it to those tools.
+        """
+        return self._payload(names).definitions
+    
+    def get_function_definitions_json(self, names: Optional[Iterable[str]] = None) -> str:
+        """Get the function definitions pre-serialized as compact JSON."""
+        return self._payload(names).serialized
+    
+    def definitions_digest(self, names: Optional[Iterable[str]] = None) -> str:
+        """Get a SHA-256 digest of the function definitions."""
+        return self._payload(names).digest
+    
+    def is_side_effect_free(self, name: str) -> bool:
+        """Whether a tool may be run speculatively, before the model has committed to the call."""
+        tool = self._tools.get(name)
+        return tool is not None and tool.side_effect_free
+    
+    def tool_timeout(self, name: str) -> Optional[float]:
+        """A tool's own time limit in seconds, or None if it has none."""
+        tool = self._tools.get(name)
+        return tool.timeout if tool is not None else None
+    
+    def select_tools(self, message: str) -> Optional[List[str]]:
+        """Names of the tools relevant to a message, or None to offer all of them."""
+        words = message_words(message)
+        selected = [name for name, tool in self._tools.items() if tool.is_relevant(message, words)]
+        return selected or None
     
     async def execute_tool(self, name: str, **kwargs: Any) -> Dict[str, Any]:
         """Execute a tool by name."""
@@ -47,7 +189,108 @@ class ToolRegistry:
         if not tool:
             raise ValueError(f"Tool '{name}' not found")
         
-        return await tool.execute(**kwargs)
+        if isinstance(tool, LazyTool):
+            # First call: import the tool and use it directly from now on
+            tool = self._tools[name] = tool.resolve()
+            if self.config is not None:
+                tool.configure(self.config)
+        
+        with tracer.span(f"tool.{name}"):
+            if self.result_cache is None or not tool.cacheable:
+                return await self._run(tool, kwargs)
+            
+            return await self.result_cache.get_or_run(
+                f"{name}:{tool.cache_key(**kwargs)}",
+                tool.cache_ttl,
+                lambda: self._run(tool, kwargs),
+            )
+    
+    def format_result(self, name: str, result: ToolResult) -> str:
+        """Serialize a result for the model with its tool's result schema and byte budget."""
+        tool = self.get_tool(name)
+        if tool is None:
+            return compact_json(result)
+        
+        text = tool.format_result(result)
+        tracer.count("tool.result_bytes", len(text.encode("utf-8")))
+        return text
+    
+    async def _run(self, tool: Tool, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool on the event loop, or in its worker pool if it is blocking or CPU-bound."""
+        if tool.execution == "async" or not tool.should_offload(**kwargs):
+            return await tool.execute(**kwargs)
+        
+        pool = self._pool(tool.execution)
+        future = asyncio.get_running_loop().run_in_executor(pool, functools.partial(tool.run, **kwargs))
+        tracer.count(f"tool.offloaded.{tool.execution}")
+        if tool.execution != "process":
+            return await asyncio.wait_for(future, timeout=tool.timeout)
+        
+        # A thread cannot be stopped, but a worker process stuck past the tool's
+        # timeout can; the pool is killed once no other call is waiting on it
+        self._process_calls += 1
+        try:
+            return await asyncio.wait_for(future, timeout=tool.timeout)
+        except asyncio.TimeoutError:
+            self._process_stuck = True
+            raise
+        finally:
+            self._process_calls -= 1
+            if self._process_stuck and not self._process_calls:
+                self._terminate_processes()
+    
+    def _pool(self, execution: str) -> Executor:
+        """Worker pool for an execution mode, created on first use."""
+        pool = self._pools.get(execution)
+        if pool is None:
+            if execution == "process":
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                
+                context = multiprocessing.get_context()
+                self._worker_pids = context.SimpleQueue()
+                pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=context,
+                    initializer=_report_worker,
+                    initargs=(self._worker_pids,),
+                )
+            elif execution == "thread":
+                pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="tool")
+            else:
+                raise ValueError(f"Unknown tool execution mode '{execution}'")
+            self._pools[execution] = pool
+        return pool
+    
+    def _terminate_processes(self) -> None:
+        """Kill the process pool's workers; the pool is recreated on demand.
+        
+        Only called when no caller is waiting on the pool, so the workers still
+        busy are stuck past a timeout or running calls whose callers left.
+        """
+        self._process_stuck = False
+        pool = self._pools.pop("process", None)
+        if pool is None:
+            return
+        
+        tracer.count("tool.process_pool_terminated")
+        while not self._worker_pids.empty():
+            try:
+                os.kill(self._worker_pids.get(), signal.SIGTERM)
+            except OSError:
+                pass  # already exited
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def shutdown(self) -> None:
+        """Shut down the worker pools without waiting for running calls."""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _report_worker(pids: Any) -> None:
+    """Process pool initializer recording the worker's pid so it can be killed."""
+    pids.put(os.getpid())
 
 
 # Global registry instance
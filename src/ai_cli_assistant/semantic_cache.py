@@ -0,0 +1,273 @@
+"""Similarity-based cache of answers to context-free prompts."""
+
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .config import Config
+
+# Width of the hashed feature vectors
+DIMENSIONS = 1024
+
+# Weight of word-pair features relative to words and trigrams; they carry word order,
+# so "100 USD to EUR" stays well below the threshold against "100 EUR to USD"
+BIGRAM_WEIGHT = 2.0
+
+# Rows the vector matrix starts with; it doubles up to the entry limit
+INITIAL_ROWS = 64
+
+WORD = re.compile(r"[^\W_]+")
+POSSESSIVE = re.compile(r"['’]s\b")
+
+# Numbers and operators must match exactly: "2+2" is not a near-duplicate of "2*3"
+LITERAL = re.compile(r"\d+(?:\.\d+)?|[-+*/^%=<>]")
+
+# Filler words that do not change what a question asks for
+STOPWORDS = frozenset(
+    "a an the is are was be what whats how please tell me my in on at of for to do does "
+    "can could would you i about show give find get current right now today".split()
+)
+
+SparseVector = Dict[int, float]
+
+
+class Entry(NamedTuple):
+    """A cached answer and what a lookup has to match exactly to reuse it."""
+    
+    key: str
+    guard: Tuple[str, ...]
+    answer: str
+    expires_at: float
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Casefolded words of a prompt without punctuation, possessives or filler words."""
+    words = WORD.findall(POSSESSIVE.sub("", prompt.casefold()))
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+def embed(normalized: str, dimensions: int = DIMENSIONS) -> SparseVector:
+    """Unit-length hashed vector of a normalized prompt's words, word pairs and character trigrams."""
+    words = normalized.split()
+    features = [(f"b:{first} {second}", BIGRAM_WEIGHT) for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features.append((f"w:{word}", 1.0))
+        features.extend((padded[i:i + 3], 1.0) for i in range(len(padded) - 2))
+    
+    counts: SparseVector = {}
+    for feature, weight in features:
+        index = zlib.crc32(feature.encode("utf-8")) % dimensions
+        counts[index] = counts.get(index, 0.0) + weight
+    
+    norm = sum(value * value for value in counts.values()) ** 0.5
+    return {index: value / norm for index, value in counts.items()} if norm else {}
+
+
+class SemanticCache:
+    """LRU cache of answers looked up by cosine similarity of prompt embeddings.
+
+    Prompts are embedded with a hashed vectorizer of words, word pairs and
+    character trigrams, so no model is needed. With NumPy installed the vectors are rows of a matrix
+    and a batch of prompts is scored against every entry in one product;
+    without it they are kept as sparse dicts. An entry is reused when its
+    similarity reaches ``threshold`` and the prompts share the same numbers,
+    operators and ``context`` (such as the system prompt).
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        dimensions: int = DIMENSIONS,
+    ) -> None:
+        """Initialize an empty cache; NumPy is used when it is installed."""
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dimensions = dimensions
+        self._numpy: Any = numpy
+        self._matrix: Any = None
+        if numpy is not None:
+            self._matrix = numpy.zeros((min(INITIAL_ROWS, max_entries), dimensions), dtype=numpy.float32)
+        self._vectors: Dict[int, SparseVector] = {}
+        self._entries: "OrderedDict[int, Entry]" = OrderedDict()
+        self._slots: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        self._free: List[int] = []
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @classmethod
+    def from_config(cls, config: Config) -> "SemanticCache":
+        """Create a cache from configuration values."""
+        return cls(
+            threshold=config.semantic_cache_threshold,
+            max_entries=config.semantic_cache_max_entries,
+            ttl=config.semantic_cache_ttl,
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the entry count."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def lookup(self, prompt: str, context: str = "") -> Optional[str]:
+        """The cached answer to a prompt similar enough to ``prompt``, if any."""
+        return self.lookup_many([prompt], context)[0]
+    
+    def lookup_many(self, prompts: Sequence[str], context: str = "") -> List[Optional[str]]:
+        """Answers for several prompts, scored against every entry in one pass."""
+        keys = [normalize_prompt(prompt) for prompt in prompts]
+        guards = [_guard(prompt, context) for prompt in prompts]
+        vectors = [embed(key, self.dimensions) for key in keys]
+        scores = self._scores(vectors) if self._entries else [[] for _ in prompts]
+        
+        now = time.time()
+        answers: List[Optional[str]] = []
+        for guard, vector, candidates in zip(guards, vectors, scores):
+            answer = None
+            if vector:
+                for _, slot in sorted(candidates, reverse=True):
+                    entry = self._entries.get(slot)
+                    if entry is None:
+                        continue
+                    if entry.expires_at < now:
+                        self._remove(slot)
+                    elif entry.guard == guard:
+                        self._entries.move_to_end(slot)
+                        answer = entry.answer
+                        break
+            
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            answers.append(answer)
+        return answers
+    
+    def store(self, prompt: str, answer: str, context: str = "") -> None:
+        """Cache the answer to a prompt, evicting the least recently used entry if full."""
+        key = normalize_prompt(prompt)
+        vector = embed(key, self.dimensions)
+        if not vector or not answer:
+            return
+        
+        guard = _guard(prompt, context)
+        slot = self._slots.get((key, guard))
+        if slot is None:
+            if len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            slot = self._allocate()
+        
+        self._entries[slot] = Entry(key, guard, answer, time.time() + self.ttl)
+        self._entries.move_to_end(slot)
+        self._slots[(key, guard)] = slot
+        if self._matrix is not None:
+            row = self._matrix[slot]
+            row[:] = 0.0
+            for index, value in vector.items():
+                row[index] = value
+        else:
+            self._vectors[slot] = vector
+    
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        for slot in list(self._entries):
+            self._remove(slot)
+    
+    def _scores(self, vectors: List[SparseVector]) -> List[List[Tuple[float, int]]]:
+        """The ``(similarity, slot)`` pairs at or above the threshold for each vector."""
+        if self._matrix is None:
+            results = []
+            for vector in vectors:
+                candidates = []
+                for slot, stored in self._vectors.items():
+                    similarity = sum(value * stored.get(index, 0.0) for index, value in vector.items())
+                    if similarity >= self.threshold:
+                        candidates.append((similarity, slot))
+                results.append(candidates)
+            return results
+        
+        numpy = self._numpy
+        queries = numpy.zeros((len(vectors), self.dimensions), dtype=numpy.float32)
+        for row, vector in zip(queries, vectors):
+            for index, value in vector.items():
+                row[index] = value
+        
+        # Free rows are zeroed, so they never reach the threshold
+        similarities = queries @ self._matrix[:self._rows].T
+        results = []
+        for row in similarities:
+            slots = numpy.flatnonzero(row >= self.threshold)
+            results.append([(float(row[slot]), int(slot)) for slot in slots])
+        return results
+    
+    def _allocate(self) -> int:
+        """A free slot, growing the matrix when every row is in use."""
+        if self._free:
+            return self._free.pop()
+        
+        slot = self._rows
+        self._rows += 1
+        if self._matrix is not None and slot >= len(self._matrix):
+            numpy = self._numpy
+            grown = numpy.zeros((min(len(self._matrix) * 2, self.max_entries), self.dimensions), dtype=numpy.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+        return slot
+    
+    def _remove(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        self._slots.pop((entry.key, entry.guard), None)
+        self._vectors.pop(slot, None)
+        if self._matrix is not None:
+            self._matrix[slot] = 0.0
+        self._free.append(slot)
+
+
+def _guard(prompt: str, context: str) -> Tuple[str, ...]:
+    return (context, *LITERAL.findall(prompt))
+
+
+_shared_caches: Dict[Tuple[Any, ...], SemanticCache] = {}
+
+
+def shared_semantic_cache(config: Config) -> Optional[SemanticCache]:
+    """Return the process-wide semantic cache for the given configuration, if enabled.
+
+    Answers depend on the model, so each backend and model gets its own cache.
+    """
+    if not config.semantic_cache:
+        return None
+    
+    settings = (
+        config.backend,
+        config.openai_model,
+        config.semantic_cache_threshold,
+        config.semantic_cache_max_entries,
+        config.semantic_cache_ttl,
+    )
+    cache = _shared_caches.get(settings)
+    if cache is None:
+        cache = _shared_caches[settings] = SemanticCache.from_config(config)
+    return cache
@@ -0,0 +1,320 @@
+"""Multi-session server exposing the assistant over a Unix socket or local HTTP."""
+
+import asyncio
+import json
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from .client import OpenAIClient
+from .config import Config
+from .store import shared_conversation_store
+from .tracing import tracer
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1 << 20
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+Response = Tuple[int, Optional[Dict[str, Any]]]
+
+
+class HttpError(Exception):
+    """An error answered with an HTTP status and a JSON error body."""
+    
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize the error with its HTTP status."""
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Session:
+    """One conversation: its client, a lock serializing its turns, and last use."""
+    
+    client: OpenAIClient
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SessionManager:
+    """Table of live sessions with idle eviction and a size limit.
+
+    Every session owns an ``OpenAIClient`` and therefore its own history,
+    while the tool registry, completion cache, rate limiter and HTTP
+    connection pool are process-wide and shared by all of them. With a
+    conversation store configured, an evicted session resumes from its log.
+    """
+    
+    def __init__(self, config: Config) -> None:
+        """Initialize an empty session table."""
+        self.config = config
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.store = shared_conversation_store(config)
+        self._opening: Dict[str, "asyncio.Task[Session]"] = {}
+    
+    def __len__(self) -> int:
+        return len(self.sessions)
+    
+    async def get(self, session_id: str) -> Session:
+        """Return a session, creating it (and evicting the oldest) if needed."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            # Concurrent requests for a new session wait for the same resume
+            opening = self._opening.get(session_id)
+            if opening is None:
+                opening = self._opening[session_id] = asyncio.ensure_future(self._open(session_id))
+                opening.add_done_callback(lambda _: self._opening.pop(session_id, None))
+            session = await asyncio.shield(opening)
+        
+        self.sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+    
+    async def _open(self, session_id: str) -> Session:
+        """Create a session, resuming its stored conversation off the event loop."""
+        client = OpenAIClient(self.config)
+        await client.resume(session_id)
+        
+        if session_id not in self.sessions:
+            if len(self.sessions) >= self.config.max_sessions and not self._evict_oldest():
+                raise HttpError(503, "too many active sessions")
+            self.sessions[session_id] = Session(client)
+            tracer.count("server.sessions_created")
+        return self.sessions[session_id]
+    
+    def remove(self, session_id: str) -> bool:
+        """Drop a session; returns False if it did not exist."""
+        if self.sessions.pop(session_id, None) is None:
+            return False
+        self._release(session_id)
+        return True
+    
+    def _release(self, session_id: str) -> None:
+        """Let the store forget a dropped session's log once it is written."""
+        if self.store is not None:
+            self.store.release(session_id)
+    
+    def _evict_oldest(self) -> bool:
+        """Evict the least recently used idle session."""
+        for session_id, session in self.sessions.items():
+            if not session.lock.locked():
+                del self.sessions[session_id]
+                self._release(session_id)
+                tracer.count("server.sessions_evicted")
+                return True
+        return False
+    
+    def evict_idle(self) -> int:
+        """Evict sessions unused for longer than the idle timeout."""
+        deadline = time.monotonic() - self.config.session_idle_timeout
+        expired = [
+            session_id for session_id, session in self.sessions.items()
+            if session.last_used < deadline and not session.lock.locked()
+        ]
+        for session_id in expired:
+            del self.sessions[session_id]
+            self._release(session_id)
+        tracer.count("server.sessions_evicted", len(expired))
+        return len(expired)
+
+
+class AssistantServer:
+    """Minimal HTTP/1.1 JSON server, over TCP or a Unix socket.
+
+    Routes:
+        POST   /sessions                      create a session, returns its id
+        POST   /sessions/{id}/messages        run a turn: {"message": str}
+        DELETE /sessions/{id}                 forget a session
+        GET    /health                        liveness and session count
+        GET    /stats                         tracer latency and counter snapshot
+    """
+    
+    def __init__(self, config: Config) -> None:
+        """Initialize the server and its session table."""
+        self.config = config
+        self.sessions = SessionManager(config)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._evictor: Optional[asyncio.Task] = None
+    
+    async def start(self, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765) -> str:
+        """Start listening and return the address being served."""
+        if socket_path:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+            address = f"unix:{socket_path}"
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+            host, port = self._server.sockets[0].getsockname()[:2]
+            address = f"http://{host}:{port}"
+        
+        self._evictor = asyncio.create_task(self._evict_loop())
+        return address
+    
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        if self._server is None:
+            raise RuntimeError("Server is not started")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+    
+    async def close(self) -> None:
+        """Stop listening and cancel the eviction task."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    async def _evict_loop(self) -> None:
+        """Periodically evict idle sessions."""
+        interval = max(1.0, min(60.0, self.config.session_idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            self.sessions.evict_idle()
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    
+                    with tracer.span("server.request", method=method):
+                        status, payload = await self._dispatch(method, path, body)
+                except HttpError as e:
+                    status, payload, keep_alive = e.status, {"error": str(e)}, False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    tracer.count("server.errors")
+                    status, payload, keep_alive = 500, {"error": f"internal error: {e}"}, False
+                
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Read one request, or return None when the client closed the connection."""
+        request_line = await self._read_line(reader)
+        if not request_line.strip():
+            return None
+        
+        try:
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+        
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._read_line(reader)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "invalid Content-Length")
+        if length < 0:
+            raise HttpError(400, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"body exceeds {MAX_BODY_BYTES} bytes")
+        
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+    
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> bytes:
+        """Read a request or header line, rejecting lines longer than the stream's limit."""
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HttpError(413, "request line or header too long")
+    
+    def _write_response(
+        self, writer: asyncio.StreamWriter, status: int, payload: Optional[Dict[str, Any]], keep_alive: bool
+    ) -> None:
+        """Write a JSON response."""
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Response:
+        """Route a request to its handler."""
+        parts = [part for part in path.split("/") if part]
+        
+        if parts == ["health"] and method == "GET":
+            return 200, {"status": "ok", "sessions": len(self.sessions)}
+        if parts == ["stats"] and method == "GET":
+            return 200, tracer.stats()
+        if parts == ["sessions"] and method == "POST":
+            session_id = uuid.uuid4().hex
+            await self.sessions.get(session_id)
+            return 201, {"session": session_id}
+        
+        if len(parts) < 2 or parts[0] != "sessions" or not SESSION_ID.match(parts[1]):
+            raise HttpError(404, f"no route for {path}")
+        session_id = parts[1]
+        
+        if len(parts) == 2 and method == "DELETE":
+            if not self.sessions.remove(session_id):
+                raise HttpError(404, f"unknown session '{session_id}'")
+            return 204, None
+        if len(parts) == 3 and parts[2] == "messages" and method == "POST":
+            return await self._handle_message(session_id, body)
+        if len(parts) in (2, 3):
+            raise HttpError(405, f"{method} is not allowed on {path}")
+        raise HttpError(404, f"no route for {path}")
+    
+    async def _handle_message(self, session_id: str, body: bytes) -> Response:
+        """Run one turn in a session; turns of the same session run one at a time."""
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "body must be JSON")
+        if not isinstance(request, dict) or not isinstance(request.get("message"), str):
+            raise HttpError(400, "body needs a string 'message'")
+        
+        session = await self.sessions.get(session_id)
+        async with session.lock:
+            response = await session.client.chat(request["message"])
+        session.last_used = time.monotonic()
+        
+        return 200, {"session": session_id, "response": response}
@@ -0,0 +1,326 @@
+"""Persistent, append-only conversation logs with a compact offset index."""
+
+import asyncio
+import atexit
+import json
+import os
+import re
+import struct
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .config import Config
+from .history import Message, estimate_tokens
+
+# One index record per message: log offset, estimated tokens and flags
+RECORD = struct.Struct("<QIB")
+TURN_START = 1
+
+# Index records read per block when scanning backwards for the tail
+INDEX_BLOCK = 4096
+
+CONVERSATION_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+def _encode(message: Message) -> bytes:
+    """Compact single-line JSON encoding of a message."""
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _record(offset: int, message: Message, tokens: int) -> bytes:
+    """Index record of a message written at ``offset``."""
+    return RECORD.pack(offset, tokens, TURN_START if message.get("role") == "user" else 0)
+
+
+class ConversationLog:
+    """Append-only JSONL log of one conversation plus a fixed-width index.
+
+    ``<id>.jsonl`` holds one compact JSON message per line and ``<id>.idx`` a
+    ``(offset, tokens, flags)`` record per message, so resuming reads the
+    index backwards to find the tail that fits a token budget and parses
+    only that part of the log. Appends are buffered in memory; ``write_pending``
+    writes and fsyncs them and is meant to run off the event loop.
+    """
+    
+    def __init__(self, path: str, fsync: bool = True, on_append: Optional[Callable[[], None]] = None) -> None:
+        """Open (or create on first write) the log at ``path`` plus ``.jsonl``/``.idx``."""
+        self.log_path = f"{path}.jsonl"
+        self.index_path = f"{path}.idx"
+        self.fsync = fsync
+        self.on_append = on_append
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_lines: List[bytes] = []
+        self._pending_records: List[bytes] = []
+        self._truncate = False
+        self._size = self._recover()
+    
+    @property
+    def dirty(self) -> bool:
+        """Whether appended messages are waiting to be written."""
+        return bool(self._pending_lines) or self._truncate
+    
+    def __len__(self) -> int:
+        """Number of messages written to the index (pending ones excluded)."""
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // RECORD.size
+    
+    def append(self, message: Message, tokens: Optional[int] = None) -> None:
+        """Buffer a message for the next write."""
+        line = _encode(message)
+        if tokens is None:
+            tokens = estimate_tokens(message)
+        
+        with self._buffer_lock:
+            self._pending_records.append(_record(self._size, message, tokens))
+            self._pending_lines.append(line)
+            self._size += len(line)
+        
+        if self.on_append is not None:
+            self.on_append()
+    
+    def reset(self) -> None:
+        """Start the conversation over; the files are truncated on the next write."""
+        with self._buffer_lock:
+            self._pending_lines.clear()
+            self._pending_records.clear()
+            self._truncate = True
+            self._size = 0
+        
+        if self.on_append is not None:
+            self.on_append()
+    
+    def write_pending(self) -> None:
+        """Write buffered messages, the log before the index, and fsync both."""
+        with self._write_lock:
+            with self._buffer_lock:
+                lines, self._pending_lines = self._pending_lines, []
+                records, self._pending_records = self._pending_records, []
+                truncate, self._truncate = self._truncate, False
+            
+            if not lines and not truncate:
+                return
+            
+            mode = "wb" if truncate else "ab"
+            for path, chunks in ((self.log_path, lines), (self.index_path, records)):
+                with open(path, mode) as f:
+                    f.write(b"".join(chunks))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+    
+    def tail(self, token_budget: int) -> List[Message]:
+        """The most recent whole turns whose estimated tokens fit ``token_budget``.
+
+        The newest turn is always returned, even if it alone exceeds the budget.
+        """
+        self.write_pending()
+        count = len(self)
+        if not count:
+            return []
+        
+        start: Optional[int] = None
+        total = 0
+        with open(self.index_path, "rb") as f:
+            position = count
+            while position > 0 and (start is None or total <= token_budget):
+                block_start = max(0, position - INDEX_BLOCK)
+                f.seek(block_start * RECORD.size)
+                records = list(RECORD.iter_unpack(f.read((position - block_start) * RECORD.size)))
+                position = block_start
+                
+                for offset, tokens, flags in reversed(records):
+                    total += tokens
+                    if not flags & TURN_START:
+                        continue
+                    if total > token_budget and start is not None:
+                        break
+                    start = offset
+                    if total > token_budget:
+                        break
+        
+        # Everything fits, including any messages before the first turn
+        if start is None or (position == 0 and total <= token_budget):
+            start = 0
+        
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            return [json.loads(line) for line in f.read().splitlines() if line]
+    
+    def _recover(self) -> int:
+        """Reconcile the log and index after a crash; returns the log size.
+
+        Partially written records are truncated, index entries pointing past
+        the log are dropped and messages the log has but the index lacks are
+        indexed again.
+        """
+        if not os.path.exists(self.log_path):
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return 0
+        
+        log_size = os.path.getsize(self.log_path)
+        with open(self.index_path, "ab+") as index, open(self.log_path, "rb+") as log:
+            index.seek(0, os.SEEK_END)
+            count = index.tell() // RECORD.size
+            
+            # Find the end of the last indexed message that is complete in the log
+            end = 0
+            while count:
+                index.seek((count - 1) * RECORD.size)
+                offset = RECORD.unpack(index.read(RECORD.size))[0]
+                if offset < log_size:
+                    log.seek(offset)
+                    line = log.readline()
+                    if line.endswith(b"\n"):
+                        end = offset + len(line)
+                        break
+                count -= 1
+            
+            # Index complete lines written after it; drop a trailing partial line
+            log.seek(end)
+            recovered = []
+            for line in log.read().splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    break
+                recovered.append(_record(end, message, estimate_tokens(message)))
+                end += len(line)
+            
+            log.truncate(end)
+            index.truncate(count * RECORD.size)
+            index.seek(0, os.SEEK_END)
+            index.write(b"".join(recovered))
+        
+        return end
+
+
+class ConversationStore:
+    """Directory of conversation logs, written in batches by a background flush."""
+    
+    def __init__(self, directory: str, flush_interval: float = 1.0, fsync: bool = True) -> None:
+        """Initialize the store, creating its directory."""
+        self.directory = os.path.expanduser(directory)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        os.makedirs(self.directory, exist_ok=True)
+        self._logs: Dict[str, ConversationLog] = {}
+        self._released: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def from_config(cls, config: Config) -> "ConversationStore":
+        """Create a store from configuration values."""
+        return cls(config.store_dir, config.store_flush_interval, config.store_fsync)
+    
+    def open(self, conversation_id: str) -> ConversationLog:
+        """Return the log of a conversation, opening it on first use."""
+        log = self._logs.get(conversation_id)
+        if log is None:
+            log = self._logs[conversation_id] = self._create_log(conversation_id)
+        self._released.discard(conversation_id)
+        return log
+    
+    async def resume(self, conversation_id: str, token_budget: int) -> Tuple[ConversationLog, List[Message]]:
+        """Open a conversation and read its tail in worker threads, keeping file I/O off the event loop."""
+        log = self._logs.get(conversation_id)
+        if log is None:
+            created = await asyncio.to_thread(self._create_log, conversation_id)
+            log = self._logs.setdefault(conversation_id, created)
+        self._released.discard(conversation_id)
+        return log, await asyncio.to_thread(log.tail, token_budget)
+    
+    def release(self, conversation_id: str) -> None:
+        """Forget a conversation nobody uses any more, once its pending appends are written."""
+        self._released.add(conversation_id)
+        self._prune()
+    
+    def _create_log(self, conversation_id: str) -> ConversationLog:
+        """Open a conversation's log files, recovering them after a crash."""
+        if not CONVERSATION_ID.match(conversation_id):
+            raise ValueError(f"Invalid conversation id '{conversation_id}'")
+        return ConversationLog(
+            os.path.join(self.directory, conversation_id),
+            fsync=self.fsync,
+            on_append=self._schedule_flush,
+        )
+    
+    def _prune(self) -> None:
+        """Drop released logs that have nothing left to write."""
+        for conversation_id in list(self._released):
+            log = self._logs.get(conversation_id)
+            if log is None or not log.dirty:
+                self._logs.pop(conversation_id, None)
+                self._released.discard(conversation_id)
+    
+    def _schedule_flush(self) -> None:
+        """Make sure a flush is pending; without an event loop, write right away."""
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+        except RuntimeError:
+            self.flush_sync()
+    
+    async def _flush_later(self) -> None:
+        """Batch the appends of one flush interval into a single write.
+
+        Messages appended while a write is running find this task still
+        pending, so it keeps flushing until nothing is left to write.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            if not any(log.dirty for log in self._logs.values()):
+                return
+    
+    async def flush(self) -> None:
+        """Write every pending append in a worker thread."""
+        if any(log.dirty for log in self._logs.values()):
+            await asyncio.to_thread(self.flush_sync)
+        self._prune()
+    
+    def flush_sync(self) -> None:
+        """Write every pending append on the calling thread."""
+        for log in list(self._logs.values()):
+            log.write_pending()
+    
+    async def close(self) -> None:
+        """Cancel the scheduled flush and write everything pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+# Stores shared by every session in the process, keyed by their settings
+_shared_stores: Dict[Tuple[str, float, bool], ConversationStore] = {}
+
+
+def shared_conversation_store(config: Config) -> Optional[ConversationStore]:
+    """Return the process-wide store for the configuration, or None when disabled."""
+    if not config.store_dir:
+        return None
+    settings = (config.store_dir, config.store_flush_interval, config.store_fsync)
+    store = _shared_stores.get(settings)
+    if store is None:
+        store = _shared_stores[settings] = ConversationStore.from_config(config)
+    return store
+
+
+async def close_conversation_stores() -> None:
+    """Flush every shared store."""
+    for store in list(_shared_stores.values()):
+        await store.close()
+
+
+def _flush_at_exit() -> None:
+    for store in list(_shared_stores.values()):
+        store.flush_sync()
+
+
+atexit.register(_flush_at_exit)
@@ -1,7 +1,22 @@
 """Tool system for AI CLI Assistant."""
 
-from .calculator import CalculatorTool
-from .weather import WeatherTool
-from .web_search import WebSearchTool
+from typing import Any
 
-__all__ = ["CalculatorTool", "WeatherTool", "WebSearchTool"]
+from .specs import BUILTIN_TOOLS
+
+__all__ = ["BUILTIN_TOOLS", "CalculatorTool", "WeatherTool", "WebSearchTool"]
+
+# Tool classes are imported on first access so that importing the package stays cheap
+_LAZY_CLASSES = {
+    "CalculatorTool": ".calculator",
+    "WeatherTool": ".weather",
+    "WebSearchTool": ".web_search",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_CLASSES:
+        from importlib import import_module
+        
+        return getattr(import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
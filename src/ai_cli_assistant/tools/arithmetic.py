@@ -0,0 +1,153 @@
+"""Restricted arithmetic engine used by the calculator tool."""
+
+import ast
+import math
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+Number = Union[int, float]
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_OPERATIONS = 200
+MAX_EXPONENT = 1000
+MAX_MAGNITUDE = 1e100
+
+_BINARY_OPS: Dict[type, Callable[[Number, Number], Number]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS: Dict[type, Callable[[Number], Number]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Program instructions: ("push", value), ("unary", op) or ("binary", op)
+Instruction = Tuple[str, Any]
+
+
+class CalculationError(ValueError):
+    """Raised when an expression is invalid or exceeds the evaluation limits."""
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """An expression validated and flattened into a postfix program."""
+    
+    expression: str
+    program: Tuple[Instruction, ...]
+    
+    def evaluate(self) -> Number:
+        """Run the program on a small value stack."""
+        stack: List[Number] = []
+        for kind, arg in self.program:
+            if kind == "push":
+                stack.append(arg)
+            elif kind == "unary":
+                stack.append(arg(stack.pop()))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(_apply_binary(arg, left, right))
+        return _check_magnitude(stack[0])
+
+
+def _apply_binary(op: Callable[[Number, Number], Number], left: Number, right: Number) -> Number:
+    """Apply a binary operator, enforcing the exponent and magnitude limits."""
+    if op is operator.pow:
+        _check_power(left, right)
+    
+    try:
+        result = op(left, right)
+    except ZeroDivisionError:
+        raise CalculationError("division by zero")
+    except OverflowError:
+        raise CalculationError("result is too large")
+    
+    if isinstance(result, complex):
+        raise CalculationError("result is not a real number")
+    return _check_magnitude(result)
+
+
+def _check_magnitude(value: Number) -> Number:
+    """Reject infinite, NaN or oversized values, which have no JSON representation or exceed the limits."""
+    if isinstance(value, float) and not math.isfinite(value):
+        raise CalculationError("result is not a finite number")
+    if abs(value) > MAX_MAGNITUDE:
+        raise CalculationError("result is too large")
+    return value
+
+
+def _check_power(base: Number, exponent: Number) -> None:
+    """Reject powers whose result would exceed the limits before computing them."""
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculationError(f"exponent exceeds {MAX_EXPONENT}")
+    if base in (0, 1, -1) or exponent <= 0:
+        return
+    if exponent * math.log10(abs(base)) > math.log10(MAX_MAGNITUDE):
+        raise CalculationError("result is too large")
+
+
+def _compile_node(node: ast.AST, program: List[Instruction]) -> None:
+    """Append the postfix instructions for ``node`` to ``program``."""
+    if len(program) > MAX_OPERATIONS:
+        raise CalculationError(f"expression exceeds {MAX_OPERATIONS} operations")
+    
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        program.append(("push", _check_magnitude(node.value)))
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        _compile_node(node.operand, program)
+        program.append(("unary", _UNARY_OPS[type(node.op)]))
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        _compile_node(node.left, program)
+        _compile_node(node.right, program)
+        program.append(("binary", _BINARY_OPS[type(node.op)]))
+    else:
+        raise CalculationError("unsupported syntax in expression")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse and validate an expression once; results are cached per expression."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"expression exceeds {MAX_EXPRESSION_LENGTH} characters")
+    
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except (SyntaxError, ValueError):
+        raise CalculationError("invalid expression")
+    except RecursionError:
+        raise CalculationError("expression is nested too deeply")
+    
+    program: List[Instruction] = []
+    try:
+        _compile_node(tree.body, program)
+    except RecursionError:
+        raise CalculationError("expression is nested too deeply")
+    # Unary chains only append after their operand, so check the finished program too
+    if len(program) > MAX_OPERATIONS:
+        raise CalculationError(f"expression exceeds {MAX_OPERATIONS} operations")
+    return CompiledExpression(expression, tuple(program))
+
+
+def evaluate(expression: str) -> Number:
+    """Evaluate a single arithmetic expression."""
+    return compile_expression(expression).evaluate()
+
+
+def evaluate_many(expressions: List[str]) -> List[Union[Number, CalculationError]]:
+    """Evaluate a batch of expressions, returning a result or error for each."""
+    results: List[Union[Number, CalculationError]] = []
+    for expression in expressions:
+        try:
+            results.append(evaluate(expression))
+        except CalculationError as e:
+            results.append(e)
+    return results
@@ -1,51 +1,74 @@
 """Calculator tool for AI CLI Assistant."""
 
+import json
+
 from ..base import Tool
-from typing import Any, Dict
+from .specs import CALCULATOR
+from .arithmetic import CalculationError, evaluate, evaluate_many
+from typing import Any, Dict, List
+
+# Batches larger than this are evaluated in the process pool
+OFFLOAD_BATCH_SIZE = 64
 
 
 class CalculatorTool(Tool):
     """Calculator tool for mathematical expressions."""
     
+    cacheable = True
+    cache_ttl = 3600.0
+    side_effect_free = True
+    
+    # Large batches are CPU-bound; single expressions stay on the event loop
+    execution = "process"
+    timeout = CALCULATOR.timeout
+    
+    result_schema = {"expression": None, "result": None, "error": None, "results": None}
+    
+    keywords = CALCULATOR.keywords
+    relevance_pattern = CALCULATOR.relevance_pattern
+    
     @property
     def name(self) -> str:
-        return "calculator"
+        return CALCULATOR.name
     
     @property
     def description(self) -> str:
-        return "Evaluate mathematical expressions safely. Return the result in plain text format without LaTeX notation."
+        return CALCULATOR.description
     
     @property
     def parameters(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "expression": {
-                    "type": "string",
-                    "description": "Mathematical expression to evaluate"
-                }
-            },
-            "required": ["expression"]
-        }
+        return CALCULATOR.parameters
+    
+    def cache_key(self, **kwargs: Any) -> str:
+        # Only surrounding whitespace is insignificant: "1 2" is an error, not "12"
+        expressions = kwargs.get("expressions")
+        if expressions:
+            return "many:" + json.dumps([str(expression).strip() for expression in expressions])
+        return "one:" + str(kwargs.get("expression", "")).strip()
+    
+    def should_offload(self, **kwargs: Any) -> bool:
+        return len(kwargs.get("expressions") or ()) > OFFLOAD_BATCH_SIZE
     
     async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.run(**kwargs)
+    
+    def run(self, **kwargs: Any) -> Dict[str, Any]:
+        expressions = kwargs.get("expressions")
+        if expressions:
+            return self._evaluate_batch([str(expression) for expression in expressions])
+        
         expression = kwargs.get("expression", "")
         try:
-            # Simple safe evaluation for basic math
-            allowed_chars = set('0123456789+-*/(). ')
-            if not all(c in allowed_chars for c in expression):
-                return {"error": "Invalid characters in expression"}
-            
-            result = eval(expression)
-            return {
-                "result": result, 
-                "expression": expression,
-                "formatted_result": f"{expression} = {result}",
-                "plain_result": str(result),
-                "clean_result": f"The result of {expression} is {result}.",
-                "answer": f"{expression} equals {result}",
-                "calculation": f"{expression} = {result}",
-                "final_answer": f"Answer: {result}"
-            }
-        except Exception as e:
+            return {"expression": expression, "result": evaluate(expression)}
+        except CalculationError as e:
             return {"error": f"Calculation error: {e}"}
+    
+    def _evaluate_batch(self, expressions: List[str]) -> Dict[str, Any]:
+        results = []
+        for expression, outcome in zip(expressions, evaluate_many(expressions)):
+            if isinstance(outcome, CalculationError):
+                results.append({"expression": expression, "error": f"Calculation error: {outcome}"})
+            else:
+                results.append({"expression": expression, "result": outcome})
+        
+        return {"results": results}
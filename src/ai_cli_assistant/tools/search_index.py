@@ -0,0 +1,483 @@
+"""Offline full-text search: BM25 over an inverted index of memory-mapped segments."""
+
+import bisect
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Segments kept before additions trigger a compaction into one
+MAX_SEGMENTS = 8
+
+SNIPPET_CHARS = 200
+
+TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it of on or that the this to was what when where which who why with"
+    .split()
+)
+
+# Lexicon record, sorted by term: term offset and length in terms.bin,
+# postings offset (in items) in postings.bin and document frequency
+LEXICON = struct.Struct("<QIQI")
+
+# Reserved term whose postings locate a document by its id
+ID_PREFIX = "\x00id:"
+
+SEGMENT_FILES = ("lexicon.bin", "terms.bin", "postings.bin", "lengths.bin", "docs.bin", "docs.idx")
+
+MANIFEST = "manifest.json"
+
+Document = Dict[str, Any]
+Buffer = Any  # bytes or mmap
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords, with plural ``s`` folded."""
+    return [
+        token[:-1] if len(token) > 3 and token[-1] == "s" and token[-2] not in "su" else token
+        for token in TOKEN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def build_segment(documents: Iterable[Document]) -> Tuple[Dict[str, bytes], int, int]:
+    """Index documents into segment files; returns them with the doc count and total length.
+
+    Postings of a term are stored as its document numbers followed by the
+    matching term frequencies, as native-order uint32 arrays.
+    """
+    postings: Dict[str, Tuple[array, array]] = {}
+    lengths = array("I")
+    docs = bytearray()
+    doc_offsets = array("Q", [0])
+    
+    for local, document in enumerate(documents):
+        tokens = tokenize(f"{document.get('title', '')} {document.get('text', '')}")
+        lengths.append(len(tokens))
+        
+        counts = Counter(tokens)
+        counts[ID_PREFIX + str(document["id"])] = 0
+        for term, frequency in counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array("I"), array("I"))
+            entry[0].append(local)
+            entry[1].append(frequency)
+        
+        docs += json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        doc_offsets.append(len(docs))
+    
+    lexicon = bytearray()
+    terms = bytearray()
+    postings_data = array("I")
+    for term in sorted(postings, key=lambda term: term.encode("utf-8")):
+        encoded = term.encode("utf-8")
+        doc_numbers, frequencies = postings[term]
+        lexicon += LEXICON.pack(len(terms), len(encoded), len(postings_data), len(doc_numbers))
+        terms += encoded
+        postings_data.extend(doc_numbers)
+        postings_data.extend(frequencies)
+    
+    files = {
+        "lexicon.bin": bytes(lexicon),
+        "terms.bin": bytes(terms),
+        "postings.bin": postings_data.tobytes(),
+        "lengths.bin": lengths.tobytes(),
+        "docs.bin": bytes(docs),
+        "docs.idx": doc_offsets.tobytes(),
+    }
+    return files, len(lengths), sum(lengths)
+
+
+class Segment:
+    """Read-only view of one segment, over mmaps or in-memory bytes."""
+    
+    def __init__(self, name: str, buffers: Mapping[str, Buffer], doc_count: int, total_length: int) -> None:
+        """Wrap the segment's file buffers."""
+        self.name = name
+        self.doc_count = doc_count
+        self.total_length = total_length
+        self._lexicon = buffers["lexicon.bin"]
+        self._terms = buffers["terms.bin"]
+        self._postings = memoryview(buffers["postings.bin"]).cast("I")
+        self.lengths = memoryview(buffers["lengths.bin"]).cast("I")
+        self._docs = buffers["docs.bin"]
+        self._doc_offsets = memoryview(buffers["docs.idx"]).cast("Q")
+        self._term_count = len(self._lexicon) // LEXICON.size
+    
+    @classmethod
+    def open(cls, path: str, doc_count: int, total_length: int) -> "Segment":
+        """Memory-map a segment directory."""
+        buffers: Dict[str, Buffer] = {}
+        for name in SEGMENT_FILES:
+            with open(os.path.join(path, name), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                buffers[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return cls(os.path.basename(path), buffers, doc_count, total_length)
+    
+    def postings(self, term: str) -> Optional[Tuple[memoryview, memoryview]]:
+        """Document numbers and term frequencies of a term, found by binary search."""
+        encoded = term.encode("utf-8")
+        low, high = 0, self._term_count
+        while low < high:
+            middle = (low + high) // 2
+            term_offset, term_length, offset, frequency = LEXICON.unpack_from(
+                self._lexicon, middle * LEXICON.size
+            )
+            candidate = self._terms[term_offset:term_offset + term_length]
+            if candidate < encoded:
+                low = middle + 1
+            elif candidate > encoded:
+                high = middle
+            else:
+                return (
+                    self._postings[offset:offset + frequency],
+                    self._postings[offset + frequency:offset + 2 * frequency],
+                )
+        return None
+    
+    def locate(self, doc_id: str) -> List[int]:
+        """Document numbers holding the document with this id."""
+        found = self.postings(ID_PREFIX + doc_id)
+        return list(found[0]) if found else []
+    
+    def document(self, local: int) -> Document:
+        """Stored fields of a document."""
+        return json.loads(self._docs[self._doc_offsets[local]:self._doc_offsets[local + 1]])
+
+
+class SearchIndex:
+    """BM25 search over immutable segments, with incremental updates.
+
+    Added documents go into a new segment and older versions with the same
+    id are marked deleted; past ``MAX_SEGMENTS`` segments the live documents
+    are compacted into one. On disk each segment is a directory of flat
+    files that are memory-mapped, so opening an index reads only its small
+    manifest. Without a directory the index lives in memory. Writes assume
+    a single writer; readers pick up a newer manifest on ``refresh``.
+    """
+    
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """Open the index in ``directory`` (created if missing), or an empty in-memory index."""
+        self.directory = os.path.expanduser(directory) if directory else None
+        self.segments: List[Segment] = []
+        self.deleted: Dict[str, Set[int]] = {}
+        self.generation = 0
+        self._next_segment = 0
+        self._manifest_mtime: Optional[int] = None
+        self._norms: Dict[str, List[float]] = {}
+        self._norms_avgdl = 0.0
+        
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.refresh()
+    
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document], directory: Optional[str] = None) -> "SearchIndex":
+        """Create an index holding ``documents``."""
+        index = cls(directory)
+        index.add(documents)
+        return index
+    
+    def __len__(self) -> int:
+        """Number of live documents."""
+        return sum(segment.doc_count for segment in self.segments) - sum(
+            len(deleted) for deleted in self.deleted.values()
+        )
+    
+    def refresh(self) -> bool:
+        """Reload the manifest if another process changed it; returns whether it did."""
+        path = os.path.join(self.directory, MANIFEST) if self.directory else None
+        if path is None or not os.path.exists(path):
+            return False
+        
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == self._manifest_mtime:
+            return False
+        
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.segments = [
+            Segment.open(os.path.join(self.directory, entry["name"]), entry["docs"], entry["length"])
+            for entry in manifest["segments"]
+        ]
+        self.deleted = {name: set(locals_) for name, locals_ in manifest["deleted"].items()}
+        self.generation = manifest["generation"]
+        self._next_segment = manifest["next_segment"]
+        self._manifest_mtime = mtime
+        self._norms.clear()
+        return True
+    
+    def add(self, documents: Iterable[Document]) -> int:
+        """Add or replace documents (matched by ``id``); returns how many were added."""
+        latest: Dict[str, Document] = {}
+        for document in documents:
+            if "id" not in document:
+                raise ValueError("Search documents need an 'id'")
+            latest[str(document["id"])] = {**document, "id": str(document["id"])}
+        if not latest:
+            return 0
+        
+        for doc_id in latest:
+            self._tombstone(doc_id)
+        self.segments.append(self._write_segment(latest.values()))
+        
+        if len(self.segments) > MAX_SEGMENTS:
+            self.compact()
+        else:
+            self._commit()
+        return len(latest)
+    
+    def delete(self, doc_ids: Iterable[str]) -> int:
+        """Delete documents by id; returns how many were found."""
+        found = sum(self._tombstone(str(doc_id)) for doc_id in doc_ids)
+        if found:
+            self._commit()
+        return found
+    
+    def compact(self) -> None:
+        """Rewrite the live documents into a single segment."""
+        old = self.segments
+        live = list(self._live_documents())
+        self.segments = [self._write_segment(live)] if live else []
+        self.deleted = {}
+        self._commit()
+        
+        if self.directory:
+            for segment in old:
+                shutil.rmtree(os.path.join(self.directory, segment.name), ignore_errors=True)
+    
+    def search(self, query: str, limit: int = 5) -> List[Document]:
+        """The ``limit`` best BM25 matches, with ``score`` and a ``snippet``.
+        
+        Terms are scored rarest first (MaxScore): once the ``limit``-th best
+        score beats the most the remaining, more common terms could add, a
+        document they alone match cannot enter the results, so those terms
+        are only looked up for the current candidates instead of scanned.
+        """
+        terms = set(tokenize(query))
+        total_docs = sum(segment.doc_count for segment in self.segments)
+        if not terms or not total_docs or limit <= 0:
+            return []
+        
+        avgdl = sum(segment.total_length for segment in self.segments) / total_docs or 1.0
+        if avgdl != self._norms_avgdl:
+            self._norms.clear()
+            self._norms_avgdl = avgdl
+        
+        matches = []
+        for term in terms:
+            per_segment = [segment.postings(term) for segment in self.segments]
+            frequency = sum(len(found[0]) for found in per_segment if found)
+            if frequency:
+                idf = math.log(1 + (total_docs - frequency + 0.5) / (frequency + 0.5))
+                matches.append((idf * (K1 + 1), per_segment))
+        matches.sort(key=lambda match: match[0], reverse=True)
+        
+        # Documents are keyed by their segment's base plus their local number
+        bases = list(itertools.accumulate((segment.doc_count for segment in self.segments), initial=0))
+        scores: Dict[int, float] = {}
+        remaining = sum(bound for bound, _ in matches)
+        for number, (bound, per_segment) in enumerate(matches):
+            if len(scores) >= limit:
+                threshold = heapq.nlargest(limit, scores.values())[-1]
+                if threshold >= remaining:
+                    scores = self._rescore(scores, threshold, remaining, matches[number:], bases, avgdl)
+                    break
+            self._accumulate(scores, bound, per_segment, bases, avgdl)
+            remaining -= bound
+        
+        results = []
+        for key, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            position = bisect.bisect_right(bases, key) - 1
+            document = self.segments[position].document(key - bases[position])
+            document["score"] = round(score, 4)
+            document["snippet"] = _snippet(document.get("text", ""), terms)
+            document.pop("text", None)
+            results.append(document)
+        return results
+    
+    def _accumulate(
+        self,
+        scores: Dict[int, float],
+        weight: float,
+        per_segment: List[Optional[Tuple[memoryview, memoryview]]],
+        bases: List[int],
+        avgdl: float,
+    ) -> None:
+        """Add a term's contribution to every live document in its postings."""
+        seeding = not scores
+        get = scores.get
+        for segment, base, found in zip(self.segments, bases, per_segment):
+            if not found:
+                continue
+            norms = self._segment_norms(segment, avgdl)
+            deleted = self.deleted.get(segment.name, ())
+            if seeding:
+                # The first term only inserts, which a bulk update does much faster
+                docs, frequencies = found
+                scores.update(zip(
+                    [base + local for local in docs],
+                    [weight * frequency / (frequency + norms[local]) for local, frequency in zip(docs, frequencies)],
+                ))
+                for local in deleted:
+                    scores.pop(base + local, None)
+                continue
+            for local, frequency in zip(*found):
+                if local not in deleted:
+                    key = base + local
+                    scores[key] = get(key, 0.0) + weight * frequency / (frequency + norms[local])
+    
+    def _rescore(
+        self,
+        scores: Dict[int, float],
+        threshold: float,
+        remaining: float,
+        matches: List[Tuple[float, List[Optional[Tuple[memoryview, memoryview]]]]],
+        bases: List[int],
+        avgdl: float,
+    ) -> Dict[int, float]:
+        """Finish the candidates that can still reach ``threshold`` by looking up the remaining terms.
+        
+        Each segment's candidates are found in a term's postings by binary
+        search, or by one pass over the postings when there are many of them.
+        """
+        candidates = {key: score for key, score in scores.items() if score + remaining > threshold}
+        by_segment: Dict[int, List[int]] = {}
+        for key in candidates:
+            by_segment.setdefault(bisect.bisect_right(bases, key) - 1, []).append(key)
+        
+        for weight, per_segment in matches:
+            for position, keys in by_segment.items():
+                found = per_segment[position]
+                if not found:
+                    continue
+                base = bases[position]
+                norms = self._segment_norms(self.segments[position], avgdl)
+                docs, frequencies = found
+                if len(keys) * 16 < len(docs):
+                    for key in keys:
+                        local = key - base
+                        index = bisect.bisect_left(docs, local)
+                        if index < len(docs) and docs[index] == local:
+                            frequency = frequencies[index]
+                            candidates[key] += weight * frequency / (frequency + norms[local])
+                    continue
+                for local, frequency in zip(docs, frequencies):
+                    key = base + local
+                    if key in candidates:
+                        candidates[key] += weight * frequency / (frequency + norms[local])
+        return candidates
+    
+    def _segment_norms(self, segment: Segment, avgdl: float) -> List[float]:
+        """Per-document BM25 length normalization, cached until the average length changes."""
+        norms = self._norms.get(segment.name)
+        if norms is None:
+            scale = K1 * B / avgdl
+            base = K1 * (1 - B)
+            norms = self._norms[segment.name] = [base + scale * length for length in segment.lengths]
+        return norms
+    
+    def _live_documents(self) -> Iterator[Document]:
+        for segment in self.segments:
+            deleted = self.deleted.get(segment.name, ())
+            for local in range(segment.doc_count):
+                if local not in deleted:
+                    yield segment.document(local)
+    
+    def _tombstone(self, doc_id: str) -> int:
+        """Mark every live copy of a document deleted; returns how many there were."""
+        found = 0
+        for segment in self.segments:
+            deleted = self.deleted.setdefault(segment.name, set())
+            for local in segment.locate(doc_id):
+                if local not in deleted:
+                    deleted.add(local)
+                    found += 1
+        return found
+    
+    def _write_segment(self, documents: Iterable[Document]) -> Segment:
+        """Build a segment and, for an on-disk index, write it atomically."""
+        files, doc_count, total_length = build_segment(documents)
+        name = f"segment-{self._next_segment:06d}"
+        self._next_segment += 1
+        if not self.directory:
+            return Segment(name, files, doc_count, total_length)
+        
+        path = os.path.join(self.directory, name)
+        tmp_path = os.path.join(self.directory, f".tmp-{name}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for file_name, data in files.items():
+            with open(os.path.join(tmp_path, file_name), "wb") as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+        return Segment.open(path, doc_count, total_length)
+    
+    def _commit(self) -> None:
+        """Publish the current segments and deletions."""
+        self.generation += 1
+        names = {segment.name for segment in self.segments}
+        self._norms = {name: norms for name, norms in self._norms.items() if name in names}
+        if not self.directory:
+            return
+        
+        manifest = {
+            "generation": self.generation,
+            "next_segment": self._next_segment,
+            "segments": [
+                {"name": segment.name, "docs": segment.doc_count, "length": segment.total_length}
+                for segment in self.segments
+            ],
+            "deleted": {name: sorted(locals_) for name, locals_ in self.deleted.items() if locals_},
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+        self._manifest_mtime = os.stat(path).st_mtime_ns
+
+
+def _snippet(text: str, terms: Set[str]) -> str:
+    """A window of ``text`` around the first query term it contains."""
+    lowered = text.lower()
+    start = len(text)
+    for term in terms:
+        match = re.search(rf"\b{re.escape(term)}", lowered)
+        if match:
+            start = min(start, match.start())
+    start = max(0, start - SNIPPET_CHARS // 4) if start < len(text) else 0
+    snippet = " ".join(text[start:start + SNIPPET_CHARS].split())
+    return ("..." if start else "") + snippet + ("..." if start + SNIPPET_CHARS < len(text) else "")
+
+
+def read_documents(paths: Iterable[str]) -> Iterator[Document]:
+    """Documents from JSONL files of ``{id, title, url, text}`` records or from plain text files.
+
+    A text file becomes one document whose id is its path and title its first line.
+    """
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            continue
+        
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        title = text.strip().splitlines()[0].lstrip("# ").strip() if text.strip() else os.path.basename(path)
+        yield {"id": path, "title": title, "text": text}
@@ -0,0 +1,83 @@
+"""Static specs of the built-in tools.
+
+Kept free of heavy imports so the CLI can offer every tool to the model
+while importing a tool's module only when the model first calls it.
+"""
+
+from ..base import ToolSpec
+
+CALCULATOR = ToolSpec(
+    name="calculator",
+    description="Evaluate mathematical expressions safely. Return the result in plain text format without LaTeX notation.",
+    parameters={
+        "type": "object",
+        "properties": {
+            "expression": {
+                "type": "string",
+                "description": "Mathematical expression to evaluate"
+            },
+            "expressions": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Several expressions to evaluate in one call"
+            }
+        }
+    },
+    target="ai_cli_assistant.tools.calculator:CalculatorTool",
+    keywords=(
+        "calculate", "calculation", "compute", "math", "plus", "minus", "times",
+        "multiply", "multiplied", "divide", "divided", "sum", "product", "percent",
+    ),
+    # Something like "12 * 4" or "(3+4)/2" in a message
+    relevance_pattern=r"\d\s*[-+*/%^]\s*[(\d]",
+    side_effect_free=True,
+    timeout=10.0,
+)
+
+WEATHER = ToolSpec(
+    name="weather",
+    description="Get weather information for a location",
+    parameters={
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "City or location name"
+            },
+            "locations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Several locations to look up in one call"
+            }
+        }
+    },
+    target="ai_cli_assistant.tools.weather:WeatherTool",
+    keywords=(
+        "weather", "temperature", "forecast", "rain", "rainy", "sunny", "humidity",
+        "humid", "cold", "hot", "climate",
+    ),
+    side_effect_free=True,
+)
+
+WEB_SEARCH = ToolSpec(
+    name="web_search",
+    description="Search the web for information",
+    parameters={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Search query"
+            }
+        },
+        "required": ["query"]
+    },
+    target="ai_cli_assistant.tools.web_search:WebSearchTool",
+    keywords=(
+        "search", "find", "lookup", "google", "web", "resources", "tutorial",
+        "tutorials", "learn", "documentation", "docs",
+    ),
+    side_effect_free=True,
+)
+
+BUILTIN_TOOLS = (CALCULATOR, WEATHER, WEB_SEARCH)
@@ -1,67 +1,76 @@
 """Weather tool for AI CLI Assistant."""
 
+import json
+
 from ..base import Tool
-from typing import Any, Dict
+from ..config import Config
+from .specs import WEATHER
+from .weather_provider import BUILTIN_LOCATIONS, CachingProvider, LocalDatasetProvider, Observation, WeatherProvider
+from typing import Any, Dict, Optional
 
 
 class WeatherTool(Tool):
     """Weather information tool."""
     
+    cacheable = True
+    cache_ttl = 600.0
+    side_effect_free = True
+    
+    keywords = WEATHER.keywords
+    
+    result_schema = {
+        "location": None, "temperature": None, "condition": None, "humidity": None, "error": None,
+        "results": {"location": None, "temperature": None, "condition": None, "humidity": None, "error": None},
+    }
+    
+    def __init__(self, provider: Optional[WeatherProvider] = None) -> None:
+        """Initialize the tool; without a provider the built-in dataset is used."""
+        self.provider = provider or CachingProvider(LocalDatasetProvider(BUILTIN_LOCATIONS))
+    
     @property
     def name(self) -> str:
-        return "weather"
+        return WEATHER.name
     
     @property
     def description(self) -> str:
-        return "Get weather information for a location"
+        return WEATHER.description
     
     @property
     def parameters(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "location": {
-                    "type": "string",
-                    "description": "City or location name"
-                }
-            },
-            "required": ["location"]
-        }
+        return WEATHER.parameters
     
-    async def execute(self, **kwargs: Any) -> Dict[str, Any]:
-        location = kwargs.get("location", "")
-        
-        # Generate different weather based on location
-        import random
-        
-        # Create location-based weather patterns
-        weather_patterns = {
-            "london": {"temp": "15°C", "condition": "Rainy", "humidity": "80%"},
-            "new york": {"temp": "22°C", "condition": "Partly Cloudy", "humidity": "65%"},
-            "tokyo": {"temp": "28°C", "condition": "Sunny", "humidity": "70%"},
-            "mumbai": {"temp": "32°C", "condition": "Hot", "humidity": "85%"},
-            "paris": {"temp": "18°C", "condition": "Cloudy", "humidity": "75%"},
-            "sydney": {"temp": "24°C", "condition": "Clear", "humidity": "60%"},
-        }
-        
-        # Get weather for location (case insensitive)
-        location_lower = location.lower()
-        if location_lower in weather_patterns:
-            weather = weather_patterns[location_lower]
+    def configure(self, config: Config) -> None:
+        if config.weather_dataset:
+            dataset = LocalDatasetProvider.from_file(config.weather_dataset)
         else:
-            # Generate random weather for unknown locations
-            conditions = ["Sunny", "Cloudy", "Rainy", "Partly Cloudy", "Clear"]
-            temps = [f"{random.randint(10, 35)}°C"]
-            weather = {
-                "temp": temps[0],
-                "condition": random.choice(conditions),
-                "humidity": f"{random.randint(50, 90)}%"
-            }
+            dataset = LocalDatasetProvider(BUILTIN_LOCATIONS)
+        self.provider = CachingProvider(dataset, ttl=config.weather_cache_ttl)
+    
+    def cache_key(self, **kwargs: Any) -> str:
+        locations = kwargs.get("locations")
+        if locations:
+            return "many:" + json.dumps([str(location).strip().lower() for location in locations])
+        return "one:" + str(kwargs.get("location", "")).strip().lower()
+    
+    async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        locations = kwargs.get("locations")
+        if locations:
+            locations = [str(location) for location in locations]
+            observations = await self.provider.lookup_many(locations)
+            return {"results": [_report(*pair) for pair in zip(locations, observations)]}
         
-        return {
-            "location": location,
-            "temperature": weather["temp"],
-            "condition": weather["condition"],
-            "humidity": weather["humidity"],
-            "description": f"Weather for {location}: {weather['condition']} with {weather['temp']} temperature, {weather['humidity']} humidity"
-        }
+        location = str(kwargs.get("location", ""))
+        return _report(location, await self.provider.lookup(location))
+
+
+def _report(location: str, observation: Optional[Observation]) -> Dict[str, Any]:
+    """Tool result for one requested location."""
+    if observation is None:
+        return {"location": location, "error": f"No weather data for '{location}'"}
+    
+    return {
+        "location": observation.location,
+        "temperature": f"{observation.temperature_c:g}°C",
+        "condition": observation.condition,
+        "humidity": f"{observation.humidity}%",
+    }
@@ -0,0 +1,212 @@
+"""Weather data providers: a local dataset with fuzzy location lookup and a TTL cache."""
+
+import difflib
+import json
+import re
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Minimum similarity for a fuzzy location match
+FUZZY_CUTOFF = 0.8
+
+# Names sharing the most trigrams with a query that are compared in full
+FUZZY_CANDIDATES = 8
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+@dataclass(frozen=True)
+class Observation:
+    """Current weather at a location."""
+    
+    location: str
+    country: str
+    temperature_c: float
+    condition: str
+    humidity: int
+
+
+# Dataset used when no WEATHER_DATASET file is configured
+BUILTIN_LOCATIONS: List[Dict[str, Any]] = [
+    {"name": "London", "country": "GB", "aliases": ["greater london"],
+     "temperature_c": 15, "condition": "Rainy", "humidity": 80},
+    {"name": "New York", "country": "US", "aliases": ["new york city", "nyc"],
+     "temperature_c": 22, "condition": "Partly Cloudy", "humidity": 65},
+    {"name": "Tokyo", "country": "JP", "aliases": ["東京"],
+     "temperature_c": 28, "condition": "Sunny", "humidity": 70},
+    {"name": "Mumbai", "country": "IN", "aliases": ["bombay"],
+     "temperature_c": 32, "condition": "Hot", "humidity": 85},
+    {"name": "Paris", "country": "FR", "aliases": [],
+     "temperature_c": 18, "condition": "Cloudy", "humidity": 75},
+    {"name": "Sydney", "country": "AU", "aliases": [],
+     "temperature_c": 24, "condition": "Clear", "humidity": 60},
+]
+
+
+def normalize_location(name: str) -> str:
+    """Casefolded name without accents, punctuation or repeated whitespace."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(PUNCTUATION.sub(" ", stripped.casefold()).split())
+
+
+def _cache_key(location: str) -> str:
+    """Normalized location that keeps its first comma, which ``resolve`` splits the region off at."""
+    return ",".join(normalize_location(part) for part in location.split(",", 1))
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class WeatherProvider(ABC):
+    """Source of current weather observations."""
+    
+    @abstractmethod
+    async def lookup_many(self, locations: Sequence[str]) -> List[Optional[Observation]]:
+        """Observations for several locations in one pass, None where a location is unknown."""
+        pass
+    
+    async def lookup(self, location: str) -> Optional[Observation]:
+        """Observation for one location, or None if it is unknown."""
+        return (await self.lookup_many([location]))[0]
+
+
+class LocalDatasetProvider(WeatherProvider):
+    """Observations from an in-memory dataset indexed by normalized name and alias.
+
+    Names that are not found exactly are matched fuzzily: the names sharing
+    the most character trigrams with the query are compared with
+    ``difflib`` and the best one above ``FUZZY_CUTOFF`` wins. A trailing
+    region or country (``"Paris, France"``) is ignored if the full name is
+    unknown.
+    """
+    
+    def __init__(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Build the location index from dataset records."""
+        self._observations: Dict[str, Observation] = {}
+        self._trigram_index: Dict[str, List[str]] = {}
+        
+        for record in records:
+            observation = Observation(
+                location=record["name"],
+                country=record.get("country", ""),
+                temperature_c=float(record["temperature_c"]),
+                condition=record["condition"],
+                humidity=int(record["humidity"]),
+            )
+            for name in (record["name"], *record.get("aliases", ())):
+                key = normalize_location(name)
+                if key and key not in self._observations:
+                    self._observations[key] = observation
+                    for trigram in _trigrams(key):
+                        self._trigram_index.setdefault(trigram, []).append(key)
+    
+    @classmethod
+    def from_file(cls, path: str) -> "LocalDatasetProvider":
+        """Load a JSON list, or JSONL, of ``{name, country, aliases, temperature_c, condition, humidity}`` records."""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = json.load(f)
+        return cls(records)
+    
+    def __len__(self) -> int:
+        """Number of indexed names and aliases."""
+        return len(self._observations)
+    
+    async def lookup_many(self, locations: Sequence[str]) -> List[Optional[Observation]]:
+        resolved: Dict[str, Optional[Observation]] = {}
+        for location in locations:
+            if location not in resolved:
+                resolved[location] = self.resolve(location)
+        return [resolved[location] for location in locations]
+    
+    def resolve(self, location: str) -> Optional[Observation]:
+        """Find a location by exact normalized name, then without its region, then fuzzily."""
+        key = normalize_location(location)
+        candidates = [key]
+        if "," in location:
+            candidates.append(normalize_location(location.split(",", 1)[0]))
+        
+        for candidate in candidates:
+            observation = self._observations.get(candidate)
+            if observation is not None:
+                return observation
+        
+        for candidate in candidates:
+            match = self._fuzzy_match(candidate)
+            if match is not None:
+                return self._observations[match]
+        return None
+    
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        """The indexed name most similar to ``key``, if any is similar enough."""
+        if not key:
+            return None
+        
+        # A similar name shares most trigrams, so it is in the rarest half of them
+        postings = sorted((self._trigram_index.get(trigram, ()) for trigram in _trigrams(key)), key=len)
+        shared = Counter(name for names in postings[:len(postings) // 2 + 1] for name in names)
+        best: Optional[Tuple[float, str]] = None
+        for name, _ in shared.most_common(FUZZY_CANDIDATES):
+            ratio = difflib.SequenceMatcher(None, key, name).ratio()
+            if ratio >= FUZZY_CUTOFF and (best is None or ratio > best[0]):
+                best = (ratio, name)
+        return best[1] if best else None
+
+
+class CachingProvider(WeatherProvider):
+    """Per-location TTL cache in front of another provider.
+
+    A batch is answered from the cache where possible and the misses are
+    fetched from the wrapped provider in a single ``lookup_many`` call.
+    Unknown locations are cached too, so repeated misses stay cheap.
+    """
+    
+    def __init__(self, provider: WeatherProvider, ttl: float = 600.0, max_entries: int = 4096) -> None:
+        """Wrap ``provider``; entries expire after ``ttl`` seconds."""
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Optional[Observation]]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    async def lookup_many(self, locations: Sequence[str]) -> List[Optional[Observation]]:
+        now = time.monotonic()
+        keys = [_cache_key(location) for location in locations]
+        found: Dict[str, Optional[Observation]] = {}
+        missing: Dict[str, str] = {}
+        
+        for key, location in zip(keys, locations):
+            if key in found or key in missing:
+                continue
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                found[key] = entry[1]
+            else:
+                self.misses += 1
+                missing[key] = location
+        
+        if missing:
+            observations = await self.provider.lookup_many(list(missing.values()))
+            if len(self._entries) + len(missing) > self.max_entries:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+            for key, observation in zip(missing, observations):
+                found[key] = observation
+                if len(self._entries) < self.max_entries:
+                    self._entries[key] = (now + self.ttl, observation)
+        
+        return [found[key] for key in keys]
+    
+    def clear(self) -> None:
+        """Drop every cached observation."""
+        self._entries.clear()
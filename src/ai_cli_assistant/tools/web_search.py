@@ -1,90 +1,115 @@
 """Web search tool for AI CLI Assistant."""
 
 from ..base import Tool
-from typing import Any, Dict
+from ..config import Config
+from .specs import WEB_SEARCH
+from .search_index import SearchIndex
+from typing import Any, Dict, List, Optional
+
+# Indexes larger than this are searched on a worker thread
+OFFLOAD_DOCUMENTS = 10000
+
+MAX_RESULTS = 5
+
+# Small corpus searched when no SEARCH_INDEX_DIR is configured
+BUILTIN_DOCUMENTS: List[Dict[str, Any]] = [
+    {"id": f"builtin-{topic.replace(' ', '-')}-{number}", "title": title, "text": f"{title}. Resources about {topic}."}
+    for topic, titles in {
+        "python": [
+            "Python.org - Official Python Programming Language Website",
+            "Python Tutorial - Learn Python Programming",
+            "Python Documentation - Comprehensive Guide",
+            "Python for Beginners - Start Learning Python",
+        ],
+        "javascript": [
+            "MDN Web Docs - JavaScript Documentation",
+            "JavaScript Tutorial - Learn JavaScript Programming",
+            "W3Schools JavaScript - Interactive Tutorials",
+            "JavaScript.info - Modern JavaScript Tutorial",
+        ],
+        "machine learning": [
+            "Machine Learning Mastery - Practical ML Tutorials",
+            "Coursera Machine Learning Course by Andrew Ng",
+            "TensorFlow - Open Source ML Platform",
+            "Scikit-learn - Machine Learning in Python",
+        ],
+        "web development": [
+            "MDN Web Docs - Web Development Resources",
+            "W3Schools - Web Development Tutorials",
+            "FreeCodeCamp - Learn Web Development",
+            "The Odin Project - Full Stack Web Development",
+        ],
+        "data science": [
+            "DataCamp - Learn Data Science Online",
+            "Kaggle - Data Science Competitions",
+            "Towards Data Science - Medium Publication",
+            "Data Science Central - Community and Resources",
+        ],
+    }.items()
+    for number, title in enumerate(titles)
+]
 
 
 class WebSearchTool(Tool):
-    """Web search tool."""
+    """Web search tool backed by a local BM25 index."""
+    
+    cacheable = True
+    cache_ttl = 900.0
+    side_effect_free = True
+    
+    # Searching a large index is CPU work and may page in index files
+    execution = "thread"
+    
+    # Hits carry every stored field of a document; the model needs only these
+    result_schema = {"query": None, "results": {"title": None, "url": None, "snippet": None}}
+    
+    keywords = WEB_SEARCH.keywords
+    
+    def __init__(self) -> None:
+        """Initialize the tool; the index is opened on first use."""
+        self.index_dir = ""
+        self._index: Optional[SearchIndex] = None
     
     @property
     def name(self) -> str:
-        return "web_search"
+        return WEB_SEARCH.name
     
     @property
     def description(self) -> str:
-        return "Search the web for information"
+        return WEB_SEARCH.description
     
     @property
     def parameters(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "query": {
-                    "type": "string",
-                    "description": "Search query"
-                }
-            },
-            "required": ["query"]
-        }
+        return WEB_SEARCH.parameters
+    
+    def configure(self, config: Config) -> None:
+        if config.search_index_dir != self.index_dir:
+            self.index_dir = config.search_index_dir
+            self._index = None
+    
+    @property
+    def index(self) -> SearchIndex:
+        """The search index, reloaded when another process updated it."""
+        if self._index is None:
+            if self.index_dir:
+                self._index = SearchIndex(self.index_dir)
+            else:
+                self._index = SearchIndex.from_documents(BUILTIN_DOCUMENTS)
+        else:
+            self._index.refresh()
+        return self._index
+    
+    def cache_key(self, **kwargs: Any) -> str:
+        # Results change with the index, so key them by its generation
+        query = " ".join(str(kwargs.get("query", "")).lower().split())
+        return f"{self.index.generation}:{query}"
+    
+    def should_offload(self, **kwargs: Any) -> bool:
+        return len(self.index) > OFFLOAD_DOCUMENTS
     
     async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.run(**kwargs)
+    
+    def run(self, **kwargs: Any) -> Dict[str, Any]:
         query = kwargs.get("query", "")
-        
-        # Create realistic search results based on query
-        search_results = {
-            "python": [
-                "Python.org - Official Python Programming Language Website",
-                "Python Tutorial - Learn Python Programming",
-                "Python Documentation - Comprehensive Guide",
-                "Python for Beginners - Start Learning Python"
-            ],
-            "javascript": [
-                "MDN Web Docs - JavaScript Documentation",
-                "JavaScript Tutorial - Learn JavaScript Programming",
-                "W3Schools JavaScript - Interactive Tutorials",
-                "JavaScript.info - Modern JavaScript Tutorial"
-            ],
-            "machine learning": [
-                "Machine Learning Mastery - Practical ML Tutorials",
-                "Coursera Machine Learning Course by Andrew Ng",
-                "TensorFlow - Open Source ML Platform",
-                "Scikit-learn - Machine Learning in Python"
-            ],
-            "web development": [
-                "MDN Web Docs - Web Development Resources",
-                "W3Schools - Web Development Tutorials",
-                "FreeCodeCamp - Learn Web Development",
-                "The Odin Project - Full Stack Web Development"
-            ],
-            "data science": [
-                "DataCamp - Learn Data Science Online",
-                "Kaggle - Data Science Competitions",
-                "Towards Data Science - Medium Publication",
-                "Data Science Central - Community and Resources"
-            ]
-        }
-        
-        # Find relevant results
-        query_lower = query.lower()
-        relevant_results = []
-        
-        for key, results in search_results.items():
-            if key in query_lower:
-                relevant_results.extend(results[:2])  # Get top 2 results per category
-        
-        # If no specific results found, generate generic ones
-        if not relevant_results:
-            relevant_results = [
-                f"Top result for '{query}' - Comprehensive guide and tutorials",
-                f"Best resource for '{query}' - Expert insights and examples",
-                f"Learn '{query}' - Step-by-step tutorials and documentation"
-            ]
-        
-        return {
-            "query": query,
-            "results_count": len(relevant_results),
-            "top_results": relevant_results[:3],  # Return top 3 results
-            "summary": f"Found {len(relevant_results)} relevant results for '{query}'",
-            "detailed_results": relevant_results
-        }
+        return {"query": query, "results": self.index.search(query, limit=MAX_RESULTS)}
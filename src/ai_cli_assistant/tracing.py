@@ -0,0 +1,228 @@
+"""Lightweight tracing of completion calls and tool executions."""
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from .config import Config
+
+# Samples kept per metric for percentile estimates
+WINDOW_SIZE = 1024
+
+# Spans buffered before the JSONL exporter writes them out
+FLUSH_EVERY = 64
+
+# Seconds between rewrites of the Prometheus metrics file while spans are recorded
+PROMETHEUS_INTERVAL = 10.0
+
+EXPORT_FORMATS = ("jsonl", "prometheus")
+
+
+class RunningStats:
+    """Count and sum of every sample plus percentiles over a recent window."""
+    
+    def __init__(self, window: int = WINDOW_SIZE) -> None:
+        """Initialize empty statistics."""
+        self.count = 0
+        self.total = 0.0
+        self._window: Deque[float] = deque(maxlen=window)
+    
+    def add(self, value: float) -> None:
+        """Record a sample."""
+        self.count += 1
+        self.total += value
+        self._window.append(value)
+    
+    def percentile(self, percentile: float) -> float:
+        """Value at the given percentile (0-100) of the recent window."""
+        if not self._window:
+            return 0.0
+        ordered = sorted(self._window)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+    
+    def summary(self) -> Dict[str, float]:
+        """Count, mean and p50/p95/p99 of the samples."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class Tracer:
+    """Records spans, keeps running latency percentiles and counters."""
+    
+    def __init__(self) -> None:
+        """Initialize an enabled tracer without an exporter."""
+        self.enabled = True
+        self.export_path: Optional[str] = None
+        self.export_format = "jsonl"
+        self.latencies: Dict[str, RunningStats] = defaultdict(RunningStats)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._buffer: List[Dict[str, Any]] = []
+        self._next_export = 0.0
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+    
+    def configure(self, config: Config) -> None:
+        """Apply tracing settings from the configuration."""
+        if config.trace_export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown trace export format '{config.trace_export_format}'")
+        
+        self.enabled = config.tracing_enabled
+        self.export_path = os.path.expanduser(config.trace_export_path) if config.trace_export_path else None
+        self.export_format = config.trace_export_format
+    
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block of work; the yielded dict collects extra attributes."""
+        if not self.enabled:
+            yield attributes
+            return
+        
+        started_at = time.time()
+        start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.latencies[name].add(duration)
+            if error is not None:
+                self.counters[f"{name}.errors"] += 1
+            
+            if self.export_path and self.export_format == "jsonl":
+                record = {
+                    "span": name,
+                    "start": started_at,
+                    "duration_ms": round(duration * 1000, 3),
+                    **attributes,
+                }
+                if error is not None:
+                    record["error"] = error
+                self._buffer.append(record)
+                if len(self._buffer) >= FLUSH_EVERY:
+                    self._schedule_flush()
+            elif self.export_path and time.monotonic() >= self._next_export:
+                self._schedule_flush()
+    
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample for a metric that is not a span duration."""
+        if self.enabled:
+            self.latencies[name].add(value)
+    
+    def count(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        if self.enabled:
+            self.counters[name] += value
+    
+    def record_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Accumulate token usage reported by a completion."""
+        if not usage:
+            return
+        for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if usage.get(kind):
+                self.count(f"tokens.{kind.split('_')[0]}", usage[kind])
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of latency summaries and counters."""
+        return {
+            "latency": {name: stats.summary() for name, stats in sorted(self.latencies.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+    
+    def reset(self) -> None:
+        """Discard all recorded statistics."""
+        self.latencies.clear()
+        self.counters.clear()
+        self._buffer.clear()
+    
+    def flush(self) -> None:
+        """Write buffered spans (JSONL) or the current metrics (Prometheus) on the calling thread."""
+        write = self._take_export()
+        if write is not None:
+            write()
+    
+    def _schedule_flush(self) -> None:
+        """Export in a worker thread when on an event loop; without one, write right away."""
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_in_thread())
+        except RuntimeError:
+            self.flush()
+    
+    async def _flush_in_thread(self) -> None:
+        write = self._take_export()
+        if write is not None:
+            await asyncio.to_thread(write)
+    
+    def _take_export(self) -> Optional[Callable[[], None]]:
+        """Take what is due for export; the returned function writes it to the file."""
+        path = self.export_path
+        if not path:
+            return None
+        
+        if self.export_format == "jsonl":
+            if not self._buffer:
+                return None
+            records, self._buffer = self._buffer, []
+            
+            def append() -> None:
+                lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+                with self._write_lock, open(path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            
+            return append
+        
+        # Render on the caller's thread, where the statistics are updated
+        self._next_export = time.monotonic() + PROMETHEUS_INTERVAL
+        text = self.prometheus_text()
+        
+        def replace() -> None:
+            with self._write_lock:
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+        
+        return replace
+    
+    def prometheus_text(self) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP ai_cli_span_duration_seconds Duration of traced operations.",
+            "# TYPE ai_cli_span_duration_seconds summary",
+        ]
+        for name, stats in sorted(self.latencies.items()):
+            summary = stats.summary()
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(
+                    f'ai_cli_span_duration_seconds{{span="{name}",quantile="{quantile}"}} {summary[key]}'
+                )
+            lines.append(f'ai_cli_span_duration_seconds_sum{{span="{name}"}} {stats.total}')
+            lines.append(f'ai_cli_span_duration_seconds_count{{span="{name}"}} {stats.count}')
+        
+        for name, value in sorted(self.counters.items()):
+            metric = "ai_cli_" + name.replace(".", "_").replace("-", "_") + "_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        
+        return "\n".join(lines) + "\n"
+
+
+# Global tracer instance
+tracer = Tracer()
+atexit.register(tracer.flush)
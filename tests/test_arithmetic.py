@@ -0,0 +1,58 @@
+"""Restricted arithmetic evaluation."""
+
+import pytest
+
+from ai_cli_assistant.tools.arithmetic import CalculationError, evaluate, evaluate_many
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("2 + 3 * 4", 14),
+        ("(1 + 2) ** 3", 27),
+        ("-7 // 2", -4),
+        ("7 % 3", 1),
+        ("2 ** 0.5", 2 ** 0.5),
+        (" 10 / 4 ", 2.5),
+    ],
+)
+def test_evaluates_arithmetic(expression, expected):
+    assert evaluate(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression, message",
+    [
+        ("9**9**9", "exponent exceeds 1000"),
+        ("2**1000", "result is too large"),
+        ("1e101", "result is too large"),
+        ("1e999", "result is not a finite number"),
+        ("(-8)**0.5", "result is not a real number"),
+        ("1 / 0", "division by zero"),
+        ("1 // 0", "division by zero"),
+        ("1 % 0", "division by zero"),
+        ("abs(1)", "unsupported syntax in expression"),
+        ("True + 1", "unsupported syntax in expression"),
+        ("__import__('os')", "unsupported syntax in expression"),
+        ("1 +", "invalid expression"),
+        ("1" * 1001, "expression exceeds 1000 characters"),
+        ("+".join(["1"] * 150), "expression exceeds 200 operations"),
+        ("-" * 300 + "1", "expression exceeds 200 operations"),
+    ],
+)
+def test_rejects_unsafe_or_invalid_expressions(expression, message):
+    with pytest.raises(CalculationError) as error:
+        evaluate(expression)
+    assert str(error.value) == message
+
+
+def test_rejects_deep_nesting():
+    with pytest.raises(CalculationError):
+        evaluate("(" * 500 + "1" + ")" * 500)
+
+
+def test_evaluate_many_mixes_results_and_errors():
+    results = evaluate_many(["1 + 1", "1 / 0", "2 * 3", "abs(1)"])
+    assert results[0] == 2 and results[2] == 6
+    assert [str(result) for result in results[1::2]] == ["division by zero", "unsupported syntax in expression"]
+    assert all(isinstance(result, CalculationError) for result in results[1::2])
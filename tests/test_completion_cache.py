@@ -0,0 +1,58 @@
+"""Two-tier completion cache."""
+
+import asyncio
+
+from ai_cli_assistant.cache import CompletionCache, request_key
+
+
+def _disk_size(directory) -> int:
+    return sum(path.stat().st_size for path in directory.glob("*/*.json"))
+
+
+def test_request_key_ignores_unrelated_parameters():
+    params = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+    assert request_key(params) == request_key({**params, "stream": True, "timeout": 5})
+    assert request_key(params) != request_key({**params, "temperature": 1})
+
+
+def test_memory_tier_expires_and_evicts_least_recently_used():
+    cache = CompletionCache(max_entries=2, ttl=60)
+    
+    async def scenario():
+        await cache.set("a", {"value": "a"})
+        await cache.set("b", {"value": "b"})
+        await cache.get("a")
+        await cache.set("c", {"value": "c"})  # evicts "b", the least recently used
+        found = [await cache.get(key) for key in "abc"]
+        
+        cache.ttl = -1
+        await cache.set("d", {"value": "d"})  # already expired
+        return found, await cache.get("d")
+    
+    found, expired = asyncio.run(scenario())
+    assert found == [{"value": "a"}, None, {"value": "c"}]
+    assert expired is None
+    assert cache.evictions >= 1
+
+
+def test_disk_tier_tracks_bytes_and_evicts_oldest(tmp_path):
+    cache = CompletionCache(max_entries=1, ttl=60, directory=str(tmp_path), max_disk_bytes=1000)
+    
+    async def scenario():
+        await cache.set("aa01", {"value": "x" * 100})
+        first = (cache.stats()["disk_bytes"], _disk_size(tmp_path))
+        
+        # A fresh memory tier has to read the entry back from disk
+        cache.clear()
+        found = await cache.get("aa01")
+        
+        for index in range(20):
+            await cache.set(f"bb{index:02}", {"value": "y" * 100})
+        return first, found
+    
+    first, found = asyncio.run(scenario())
+    assert first[0] == first[1]
+    assert found == {"value": "x" * 100}
+    assert cache.disk_hits == 1
+    assert cache.stats()["disk_bytes"] == _disk_size(tmp_path) <= 1000
+    assert (tmp_path / "bb" / "bb19.json").exists()
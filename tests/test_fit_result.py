@@ -0,0 +1,45 @@
+"""Shaping tool results for the model."""
+
+import json
+
+import pytest
+
+from ai_cli_assistant.base import compact_json, fit_result, project_result
+
+
+def test_small_result_is_compact_json():
+    result = {"city": "Zürich", "temperature": 21.5, "tags": ["sunny"]}
+    assert fit_result(result, 4096) == '{"city":"Zürich","temperature":21.5,"tags":["sunny"]}'
+    assert fit_result(result, 0) == compact_json(result)
+
+
+def test_long_strings_and_lists_are_cut_and_marked():
+    text = fit_result({"text": "x" * 5000, "items": list(range(100))}, 300)
+    result = json.loads(text)
+    
+    assert len(text.encode("utf-8")) <= 300
+    assert result["truncated"] is True
+    assert result["text"].startswith("xxx") and result["text"].endswith("…")
+    assert result["items"][-1].endswith("more")
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {f"key{index}": index for index in range(500)},
+        ["é" * 300] * 3,
+    ],
+)
+def test_oversized_result_becomes_preview_within_budget(result):
+    text = fit_result(result, 200)
+    preview = json.loads(text)
+    
+    assert len(text.encode("utf-8")) <= 200
+    assert preview["truncated"] is True
+    assert preview["preview"]
+
+
+def test_project_result_keeps_schema_fields_in_order():
+    result = {"results": [{"title": "A", "url": "u", "score": 1.0, "id": "x"}], "query": "q", "took": 3}
+    schema = {"query": None, "results": {"title": None, "score": None}}
+    assert project_result(result, schema) == {"query": "q", "results": [{"title": "A", "score": 1.0}]}
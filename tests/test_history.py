@@ -0,0 +1,64 @@
+"""Token-budgeted conversation history."""
+
+from ai_cli_assistant.history import SUMMARY_PREFIX, ConversationHistory, estimate_tokens
+
+
+def _turn(index: int):
+    call_id = f"call_{index}"
+    return [
+        {"role": "user", "content": f"question {index} " + "x" * 200},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {"id": call_id, "type": "function", "function": {"name": "calculator", "arguments": "{}"}}
+            ],
+        },
+        {"role": "tool", "tool_call_id": call_id, "content": "y" * 200},
+        {"role": "assistant", "content": f"answer {index}"},
+    ]
+
+
+def test_trims_whole_turns_within_budget():
+    history = ConversationHistory(token_budget=400, summarize=False)
+    history.append({"role": "system", "content": "You are helpful."})
+    for index in range(10):
+        history.extend(_turn(index))
+    
+    messages = history.messages
+    assert messages[0] == {"role": "system", "content": "You are helpful."}
+    assert messages[1]["role"] == "user"
+    assert messages[-1] == {"role": "assistant", "content": "answer 9"}
+    assert history.token_count == sum(estimate_tokens(message) for message in messages) <= 400
+    assert len(messages) < 41
+    
+    # Every tool result is kept with the assistant message that called it
+    called = set()
+    for message in messages:
+        called.update(call["id"] for call in message.get("tool_calls") or [])
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in called
+
+
+def test_keeps_current_turn_over_budget():
+    history = ConversationHistory(token_budget=50, summarize=False)
+    history.extend(_turn(0))
+    history.extend(_turn(1))
+    
+    assert [message["role"] for message in history.messages] == ["user", "assistant", "tool", "assistant"]
+    assert history.messages[0]["content"].startswith("question 1")
+    assert history.token_count > 50
+
+
+def test_summarizes_dropped_turns():
+    history = ConversationHistory(token_budget=400)
+    history.append({"role": "system", "content": "You are helpful."})
+    for index in range(4):
+        history.extend(_turn(index))
+    
+    summary = history.messages[1]
+    assert summary["role"] == "system"
+    assert summary["content"].startswith(SUMMARY_PREFIX)
+    assert "question 0" in summary["content"]
+    assert history.token_count == sum(estimate_tokens(message) for message in history.messages)
+    assert not history.context_free
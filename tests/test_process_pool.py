@@ -0,0 +1,82 @@
+"""Process pool termination after tool timeouts."""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+import pytest
+
+from ai_cli_assistant.base import Tool
+from ai_cli_assistant.registry import ToolRegistry
+from ai_cli_assistant.tracing import tracer
+
+
+class NapTool(Tool):
+    execution = "process"
+    
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+    
+    @property
+    def name(self) -> str:
+        return "test_nap"
+    
+    @property
+    def description(self) -> str:
+        return "Sleep in a worker process"
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {"seconds": {"type": "number"}}}
+    
+    async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        return self.run(**kwargs)
+    
+    def run(self, seconds: float = 0.0, **kwargs: Any) -> Dict[str, Any]:
+        time.sleep(seconds)
+        return {"slept": seconds}
+
+
+def terminations() -> int:
+    return tracer.stats()["counters"].get("tool.process_pool_terminated", 0)
+
+
+def test_timeout_waits_for_other_calls_before_killing_pool():
+    registry = ToolRegistry(memoize=False)
+    registry.process_workers = 2
+    
+    async def scenario():
+        stuck = asyncio.ensure_future(registry._run(NapTool(timeout=0.2), {"seconds": 5}))
+        busy = asyncio.ensure_future(registry._run(NapTool(timeout=10), {"seconds": 0.6}))
+        with pytest.raises(asyncio.TimeoutError):
+            await stuck
+        assert "process" in registry._pools
+        return await busy
+    
+    before = terminations()
+    try:
+        assert asyncio.run(scenario()) == {"slept": 0.6}
+        assert terminations() - before == 1
+        assert "process" not in registry._pools
+    finally:
+        registry.shutdown()
+
+
+def test_caller_cancellation_keeps_pool():
+    registry = ToolRegistry(memoize=False)
+    registry.process_workers = 1
+    
+    async def scenario():
+        call = asyncio.ensure_future(registry._run(NapTool(timeout=10), {"seconds": 0.2}))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        return await registry._run(NapTool(timeout=10), {"seconds": 0})
+    
+    before = terminations()
+    try:
+        assert asyncio.run(scenario()) == {"slept": 0}
+        assert terminations() == before
+    finally:
+        registry.shutdown()
@@ -0,0 +1,53 @@
+"""Token-bucket rate limiting of completion requests."""
+
+import asyncio
+import time
+
+import pytest
+
+from ai_cli_assistant.client import OpenAIClient, TokenBucket, shared_rate_limiter
+from ai_cli_assistant.config import Config
+
+
+def test_acquire_gives_up_without_reserving_past_max_wait():
+    async def scenario():
+        bucket = TokenBucket(rate=10, capacity=1)
+        assert await bucket.acquire(0.05)
+        assert not await bucket.acquire(0.05)
+        start = time.perf_counter()
+        assert await bucket.acquire()
+        return time.perf_counter() - start
+    
+    # Only the first token is owed, so the unbounded acquire waits one refill
+    assert asyncio.run(scenario()) < 0.15
+
+
+def test_cancelled_waiter_returns_its_token():
+    async def scenario():
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.03)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        start = time.perf_counter()
+        await bucket.acquire()
+        return time.perf_counter() - start
+    
+    assert asyncio.run(scenario()) < 0.13
+
+
+def test_rate_limit_wait_is_bounded_by_turn_timeout():
+    config = Config(openai_api_key="", backend="mock", turn_timeout=0.2, rate_limit_rps=0.05, rate_limit_burst=1)
+    assert shared_rate_limiter(config).try_acquire()
+    
+    async def scenario():
+        client = OpenAIClient(config)
+        start = time.perf_counter()
+        reply = await client.chat("hello")
+        return reply, time.perf_counter() - start
+    
+    reply, elapsed = asyncio.run(scenario())
+    assert "time budget" in reply
+    assert elapsed < 0.5
@@ -0,0 +1,77 @@
+"""BM25 search index."""
+
+import math
+import random
+
+import pytest
+
+from ai_cli_assistant.tools.search_index import B, K1, SearchIndex, tokenize
+
+WORDS = [f"word{index}" for index in range(40)]
+
+
+def _corpus(count: int):
+    rng = random.Random(0)
+    return [
+        {"id": f"doc{index}", "title": "", "text": " ".join(rng.choices(WORDS, k=rng.randint(3, 40)))}
+        for index in range(count)
+    ]
+
+
+def _brute_force(documents, query):
+    tokenized = {document["id"]: tokenize(f"{document['title']} {document['text']}") for document in documents}
+    avgdl = sum(len(tokens) for tokens in tokenized.values()) / len(tokenized)
+    scores = {}
+    for term in set(tokenize(query)):
+        frequency = sum(term in tokens for tokens in tokenized.values())
+        if not frequency:
+            continue
+        idf = math.log(1 + (len(tokenized) - frequency + 0.5) / (frequency + 0.5))
+        for doc_id, tokens in tokenized.items():
+            count = tokens.count(term)
+            if count:
+                norm = K1 * (1 - B + B * len(tokens) / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (K1 + 1) * count / (count + norm)
+    return scores
+
+
+@pytest.mark.parametrize("limit", [1, 5, 50])
+def test_matches_brute_force_bm25(limit):
+    documents = _corpus(300)
+    index = SearchIndex()
+    for start in range(0, 300, 100):
+        index.add(documents[start:start + 100])
+    
+    rng = random.Random(limit)
+    for _ in range(20):
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 5)))
+        expected = _brute_force(documents, query)
+        results = index.search(query, limit=limit)
+        
+        best = sorted(expected.values(), reverse=True)[:limit]
+        assert [result["score"] for result in results] == pytest.approx(best, abs=1e-4)
+        for result in results:
+            assert result["score"] == pytest.approx(expected[result["id"]], abs=1e-4)
+
+
+def test_replaced_and_deleted_documents_survive_reopen(tmp_path):
+    index = SearchIndex.from_documents(
+        [
+            {"id": "a", "title": "Python", "text": "Python asyncio tutorial"},
+            {"id": "b", "title": "Rust", "text": "Rust ownership guide"},
+            {"id": "c", "title": "Go", "text": "Go channels explained"},
+        ],
+        directory=str(tmp_path),
+    )
+    index.add([{"id": "a", "title": "Python", "text": "Python typing overview"}])
+    index.delete(["b"])
+    
+    reopened = SearchIndex(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.search("asyncio") == []
+    assert reopened.search("rust ownership") == []
+    assert [result["id"] for result in reopened.search("python typing")] == ["a"]
+    
+    reopened.compact()
+    assert len(reopened) == 2 and len(reopened.segments) == 1
+    assert [result["id"] for result in reopened.search("channels")] == ["c"]
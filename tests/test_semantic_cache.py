@@ -0,0 +1,25 @@
+"""Semantic cache matching of near-duplicate prompts."""
+
+from ai_cli_assistant.semantic_cache import SemanticCache
+
+
+def test_rephrased_prompt_reuses_answer():
+    cache = SemanticCache()
+    cache.store("weather in London", "Rainy, 15°C")
+    assert cache.lookup("What's the weather in london?") == "Rainy, 15°C"
+
+
+def test_different_numbers_or_subject_miss():
+    cache = SemanticCache()
+    cache.store("calculate 2+2", "4")
+    cache.store("weather in London", "Rainy, 15°C")
+    assert cache.lookup("calculate 2*2") is None
+    assert cache.lookup("weather in Paris") is None
+
+
+def test_swapped_words_miss():
+    cache = SemanticCache()
+    cache.store("convert 100 USD to EUR", "100 USD is 92 EUR")
+    cache.store("Is Python faster than Java?", "Usually not.")
+    assert cache.lookup("convert 100 EUR to USD") is None
+    assert cache.lookup("Is Java faster than Python?") is None
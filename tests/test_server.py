@@ -0,0 +1,49 @@
+"""HTTP request parsing in server mode."""
+
+import asyncio
+from typing import Optional
+
+from ai_cli_assistant.config import Config
+from ai_cli_assistant.server import AssistantServer
+
+
+async def _exchange(raw: bytes, server: Optional[AssistantServer] = None) -> bytes:
+    server = server or AssistantServer(Config(openai_api_key="", backend="mock"))
+    address = await server.start(port=0)
+    host, port = address.removeprefix("http://").rsplit(":", 1)
+    try:
+        reader, writer = await asyncio.open_connection(host, int(port))
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+    finally:
+        await server.close()
+
+
+def test_negative_content_length_is_rejected():
+    raw = b"POST /sessions HTTP/1.1\r\nContent-Length: -1\r\n\r\n"
+    assert asyncio.run(_exchange(raw)).startswith(b"HTTP/1.1 400 ")
+
+
+def test_overlong_header_line_is_rejected():
+    raw = b"GET /health HTTP/1.1\r\nX-Padding: " + b"a" * 100_000 + b"\r\n\r\n"
+    assert asyncio.run(_exchange(raw)).startswith(b"HTTP/1.1 413 ")
+
+
+def test_health():
+    raw = b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n"
+    assert b'"status": "ok"' in asyncio.run(_exchange(raw))
+
+
+def test_unexpected_error_is_answered_with_500():
+    server = AssistantServer(Config(openai_api_key="", backend="mock"))
+    
+    async def broken(*args):
+        raise OSError("disk gone")
+    
+    server._dispatch = broken
+    response = asyncio.run(_exchange(b"GET /health HTTP/1.1\r\n\r\n", server))
+    assert response.startswith(b"HTTP/1.1 500 Internal Server Error")
+    assert b'"error": "internal error: disk gone"' in response
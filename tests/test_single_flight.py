@@ -0,0 +1,86 @@
+"""Single-flight sharing of identical in-flight calls."""
+
+import asyncio
+
+import pytest
+
+from ai_cli_assistant.cache import SingleFlight
+from ai_cli_assistant.client import OpenAIClient, completion_flights
+from ai_cli_assistant.config import Config
+from ai_cli_assistant.tracing import tracer
+
+
+def test_callers_share_result_and_error():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+        
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        results = await asyncio.gather(*(flights.do("key", run) for _ in range(3)))
+        errors = await asyncio.gather(flights.do("bad", fail), flights.do("bad", fail), return_exceptions=True)
+        return results, errors, flights.stats()
+    
+    results, errors, stats = asyncio.run(scenario())
+    assert results == [(1, False), (1, True), (1, True)]
+    assert [type(error) for error in errors] == [ValueError, ValueError]
+    assert stats == {"executions": 2, "shared": 3, "in_flight": 0}
+
+
+def test_execution_cancelled_only_when_every_caller_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        outcomes = []
+        
+        async def run():
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                outcomes.append("cancelled")
+                raise
+            outcomes.append("done")
+            return "result"
+        
+        first = asyncio.ensure_future(flights.do("key", run))
+        second = asyncio.ensure_future(flights.do("key", run))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == ("result", True)
+        
+        first = asyncio.ensure_future(flights.do("key", run))
+        second = asyncio.ensure_future(flights.do("key", run))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        second.cancel()
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        return outcomes, flights.stats()["in_flight"]
+    
+    assert asyncio.run(scenario()) == (["done", "cancelled"], 0)
+
+
+def test_concurrent_identical_completions_are_coalesced():
+    config = Config(openai_api_key="", backend="mock", mock_latency=0.02, openai_temperature=0, cache_enabled=False)
+    
+    async def scenario():
+        prompts = ["same prompt"] * 5 + [f"prompt {index}" for index in range(5)]
+        clients = [OpenAIClient(config) for _ in prompts]
+        return await asyncio.gather(
+            *(client.chat_completion(prompt, use_functions=False) for client, prompt in zip(clients, prompts))
+        )
+    
+    executions = completion_flights.executions
+    coalesced = tracer.stats()["counters"].get("completion.coalesced", 0)
+    replies = asyncio.run(scenario())
+    
+    assert {reply.content for reply in replies[:5]} == {"Mock response to: same prompt"}
+    assert completion_flights.executions - executions == 6
+    assert tracer.stats()["counters"].get("completion.coalesced", 0) - coalesced == 4
@@ -0,0 +1,49 @@
+"""Conversation store resume and release."""
+
+import asyncio
+import time
+
+from ai_cli_assistant.store import ConversationLog, ConversationStore
+
+
+def test_resume_reads_tail_and_release_drops_flushed_log(tmp_path):
+    async def scenario():
+        store = ConversationStore(str(tmp_path), flush_interval=0.01, fsync=False)
+        log = store.open("chat")
+        log.append({"role": "user", "content": "hello"})
+        log.append({"role": "assistant", "content": "hi"})
+        
+        store.release("chat")
+        assert "chat" in store._logs  # still has appends to write
+        await store.flush()
+        assert "chat" not in store._logs
+        
+        resumed, tail = await store.resume("chat", token_budget=1000)
+        assert [message["content"] for message in tail] == ["hello", "hi"]
+        assert store._logs["chat"] is resumed
+        await store.close()
+    
+    asyncio.run(scenario())
+
+
+def test_append_during_write_is_flushed(tmp_path, monkeypatch):
+    write_pending = ConversationLog.write_pending
+    
+    def slow_write(self):
+        write_pending(self)
+        time.sleep(0.1)
+    
+    monkeypatch.setattr(ConversationLog, "write_pending", slow_write)
+    
+    async def scenario():
+        store = ConversationStore(str(tmp_path), flush_interval=0.01, fsync=False)
+        log = store.open("chat")
+        log.append({"role": "user", "content": "hello"})
+        await asyncio.sleep(0.05)  # the first write is still running
+        log.append({"role": "assistant", "content": "hi"})
+        await asyncio.sleep(0.4)
+        assert not log.dirty
+        with open(log.log_path, encoding="utf-8") as f:
+            return len(f.read().splitlines())
+    
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,54 @@
+"""Tool result memoization."""
+
+import asyncio
+
+import pytest
+
+from ai_cli_assistant.cache import ToolResultCache
+
+
+def test_timed_out_execution_does_not_hold_its_key():
+    cache = ToolResultCache()
+    cancelled = []
+    
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def answer():
+        return {"value": 1}
+    
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get_or_run("key", 60, hang), timeout=0.05)
+        await asyncio.sleep(0)
+        return await asyncio.wait_for(cache.get_or_run("key", 60, answer), timeout=1)
+    
+    assert asyncio.run(scenario()) == {"value": 1}
+    assert cancelled == [True]
+    assert cache.stats() == {"hits": 0, "misses": 2, "shared": 0, "entries": 1}
+
+
+def test_results_are_shared_and_expire():
+    cache = ToolResultCache(max_entries=1)
+    calls = []
+    
+    async def run():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"calls": len(calls)}
+    
+    async def scenario():
+        first = await asyncio.gather(cache.get_or_run("a", 60, run), cache.get_or_run("a", 60, run))
+        cached = await cache.get_or_run("a", 60, run)
+        await cache.get_or_run("b", 0, run)  # evicts "a" and expires at once
+        return first, cached, await cache.get_or_run("a", 60, run), await cache.get_or_run("b", 0, run)
+    
+    first, cached, refetched, expired = asyncio.run(scenario())
+    assert first == [{"calls": 1}, {"calls": 1}]
+    assert cached == {"calls": 1}
+    assert refetched == {"calls": 3}
+    assert expired == {"calls": 4}
@@ -0,0 +1,41 @@
+"""Per-tool time limits on tool calls."""
+
+import asyncio
+from typing import Any, Dict
+
+from ai_cli_assistant.base import Tool
+from ai_cli_assistant.client import OpenAIClient
+from ai_cli_assistant.config import Config
+from ai_cli_assistant.registry import registry
+
+
+class SleepTool(Tool):
+    timeout = 0.05
+    
+    @property
+    def name(self) -> str:
+        return "test_sleep"
+    
+    @property
+    def description(self) -> str:
+        return "Sleep for a while"
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {}}
+    
+    async def execute(self, **kwargs: Any) -> Dict[str, Any]:
+        await asyncio.sleep(1)
+        return {}
+
+
+def test_tool_timeout_is_shorter_than_global_limit():
+    registry.register(SleepTool())
+    try:
+        client = OpenAIClient(Config(openai_api_key="", backend="mock", tool_timeout=30))
+        result, error = asyncio.run(client._run_tool("test_sleep", {}, asyncio.Semaphore(1)))
+    finally:
+        registry.unregister("test_sleep")
+    
+    assert result is None
+    assert str(error) == "timed out after 0.05s"
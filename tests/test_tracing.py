@@ -0,0 +1,50 @@
+"""Span export from the tracer."""
+
+import asyncio
+import json
+import threading
+
+from ai_cli_assistant.config import Config
+from ai_cli_assistant.tracing import FLUSH_EVERY, Tracer
+
+
+def _tracer(path, export_format):
+    tracer = Tracer()
+    tracer.configure(Config(openai_api_key="", trace_export_path=str(path), trace_export_format=export_format))
+    return tracer
+
+
+def test_jsonl_export_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "spans.jsonl"
+    tracer = _tracer(path, "jsonl")
+    writers = []
+    dumps = json.dumps
+    
+    def recording_dumps(*args, **kwargs):
+        writers.append(threading.current_thread() is threading.main_thread())
+        return dumps(*args, **kwargs)
+    
+    monkeypatch.setattr(json, "dumps", recording_dumps)
+    
+    async def scenario():
+        for index in range(FLUSH_EVERY + 1):
+            with tracer.span("work", index=index):
+                pass
+        await asyncio.sleep(0.1)
+    
+    asyncio.run(scenario())
+    assert len(writers) == FLUSH_EVERY + 1 and not any(writers)
+    
+    tracer.flush()
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["index"] for record in records] == list(range(FLUSH_EVERY + 1))
+
+
+def test_prometheus_export_without_event_loop(tmp_path):
+    path = tmp_path / "metrics.prom"
+    tracer = _tracer(path, "prometheus")
+    with tracer.span("work"):
+        pass
+    
+    assert 'ai_cli_span_duration_seconds_count{span="work"} 1' in path.read_text(encoding="utf-8")
@@ -0,0 +1,50 @@
+"""Turn time budget enforced around completion requests and retries."""
+
+import asyncio
+import time
+
+from ai_cli_assistant.client import OpenAIClient
+from ai_cli_assistant.config import Config
+
+
+class HangingBackend:
+    async def create(self, **params):
+        await asyncio.sleep(10)
+
+
+class FailingBackend:
+    def __init__(self):
+        self.calls = 0
+    
+    async def create(self, **params):
+        self.calls += 1
+        raise ConnectionError("backend unavailable")
+
+
+def _chat(config, backend):
+    async def scenario():
+        client = OpenAIClient(config, backend=backend)
+        start = time.perf_counter()
+        reply = await client.chat("hello")
+        return reply, time.perf_counter() - start
+    
+    return asyncio.run(scenario())
+
+
+def test_slow_completion_is_cut_at_turn_timeout():
+    config = Config(openai_api_key="", backend="mock", turn_timeout=0.2, stream_responses=False)
+    reply, elapsed = _chat(config, HangingBackend())
+    assert "time budget" in reply
+    assert elapsed < 1
+
+
+def test_retries_stop_at_turn_timeout():
+    config = Config(
+        openai_api_key="", backend="mock", turn_timeout=0.3,
+        max_retries=100, retry_base_delay=0.05, retry_max_delay=0.05,
+    )
+    backend = FailingBackend()
+    reply, elapsed = _chat(config, backend)
+    assert "time budget" in reply
+    assert elapsed < 1
+    assert backend.calls < 100
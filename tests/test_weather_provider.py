@@ -0,0 +1,27 @@
+"""Weather provider resolution and caching."""
+
+import asyncio
+
+from ai_cli_assistant.tools.weather_provider import BUILTIN_LOCATIONS, CachingProvider, LocalDatasetProvider
+
+
+def test_cache_keeps_region_separator():
+    provider = CachingProvider(LocalDatasetProvider(BUILTIN_LOCATIONS))
+    
+    async def scenario():
+        return await provider.lookup("Paris France"), await provider.lookup("Paris, France")
+    
+    unresolved, resolved = asyncio.run(scenario())
+    assert unresolved is None
+    assert resolved is not None and resolved.location == "Paris"
+
+
+def test_cache_shares_equivalent_spellings():
+    provider = CachingProvider(LocalDatasetProvider(BUILTIN_LOCATIONS))
+    
+    async def scenario():
+        return await provider.lookup_many(["Paris, FR", "  paris ,fr", "PARIS,  FR"])
+    
+    observations = asyncio.run(scenario())
+    assert [observation.location for observation in observations] == ["Paris"] * 3
+    assert (provider.hits, provider.misses) == (0, 1)